@@ -1,21 +1,24 @@
 import streamlit as st
-import plotly.express as px
-import plotly.graph_objects as go
-import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import json
 
+def _records(columns):
+    """Dict of equal-length column lists -> list of row dicts"""
+    return [dict(zip(columns, row)) for row in zip(*columns.values())]
+
 class AnalyticsDashboard:
     def __init__(self, db):
         self.db = db
     
     def show_dashboard(self):
         """Display comprehensive analytics dashboard"""
+        # Imported here so sessions that never open analytics skip plotly
+        import plotly.express as px
         
         st.markdown("## 📊 Chatbot Analytics Dashboard")
         
-        # Get analytics data
-        analytics = self.db.get_analytics()
+        # Get analytics data (plain column lists, shared by all viewers for a few seconds)
+        analytics = self.db.get_analytics_summary()
         
         # Key Metrics Row
         col1, col2, col3, col4 = st.columns(4)
@@ -30,12 +33,12 @@ class AnalyticsDashboard:
         with col2:
             st.metric(
                 "Unique Users", 
-                self._get_unique_users(),
+                analytics['unique_users'],
                 delta=self._get_daily_change('users')
             )
         
         with col3:
-            avg_session = self._get_avg_session_length()
+            avg_session = self._get_avg_session_length(analytics)
             st.metric(
                 "Avg Session Length", 
                 f"{avg_session:.1f} questions",
@@ -43,7 +46,7 @@ class AnalyticsDashboard:
             )
         
         with col4:
-            satisfaction = self._get_satisfaction_score()
+            satisfaction = self._get_satisfaction_score(analytics)
             st.metric(
                 "Satisfaction Score", 
                 f"{satisfaction:.1f}%",
@@ -55,7 +58,7 @@ class AnalyticsDashboard:
         
         with col1:
             # Intent Distribution
-            if not analytics['intent_data'].empty:
+            if analytics['intent_data']['count']:
                 fig_intent = px.pie(
                     analytics['intent_data'], 
                     values='count', 
@@ -67,7 +70,7 @@ class AnalyticsDashboard:
         
         with col2:
             # Language Distribution
-            if not analytics['language_data'].empty:
+            if analytics['language_data']['count']:
                 fig_lang = px.bar(
                     analytics['language_data'], 
                     x='language', 
@@ -79,7 +82,7 @@ class AnalyticsDashboard:
                 st.plotly_chart(fig_lang, use_container_width=True)
         
         # Daily Activity Chart
-        if not analytics['daily_data'].empty:
+        if analytics['daily_data']['count']:
             fig_daily = px.line(
                 analytics['daily_data'], 
                 x='date', 
@@ -132,21 +135,38 @@ class AnalyticsDashboard:
                 self._export_email_logs()
     
     def _get_daily_change(self, metric_type):
-        """Calculate daily change for metrics"""
-        # Implementation for daily change calculation
-        return "+5"  # Placeholder
+        """Calculate daily change for metrics (today against yesterday, UTC like the rollups)"""
+        daily = self.db.get_analytics_summary()['daily_data']
+        # Days without traffic have no rollup row, so look days up by date
+        values = dict(zip(daily['date'], daily['unique_users' if metric_type == 'users' else 'count']))
+        today = datetime.now(timezone.utc).date()
+        change = values.get(today.isoformat(), 0) - values.get((today - timedelta(days=1)).isoformat(), 0)
+        return f"{change:+d}"
+    
+    def _get_avg_session_length(self, analytics):
+        """Questions per session over all time"""
+        if not analytics['unique_users']:
+            return 0.0
+        return analytics['total_conversations'] / analytics['unique_users']
+    
+    def _get_satisfaction_score(self, analytics):
+        """Average rating as a percentage of five stars"""
+        if not analytics['rating_count']:
+            return 0.0
+        return analytics['rating_sum'] / analytics['rating_count'] / 5 * 100
     
     def _export_analytics(self):
         """Export analytics data"""
-        analytics = self.db.get_analytics()
+        analytics = self.db.get_analytics_summary()
         
         # Create comprehensive report
         report = {
             'generated_at': datetime.now().isoformat(),
             'total_conversations': analytics['total_conversations'],
-            'intent_distribution': analytics['intent_data'].to_dict('records'),
-            'language_distribution': analytics['language_data'].to_dict('records'),
-            'daily_activity': analytics['daily_data'].to_dict('records')
+            'intent_distribution': _records(analytics['intent_data']),
+            'language_distribution': _records(analytics['language_data']),
+            'daily_activity': _records({'date': analytics['daily_data']['date'],
+                                        'count': analytics['daily_data']['count']})
         }
         
         st.download_button(
@@ -0,0 +1,225 @@
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, NamedTuple
+
+from faq_index import MIN_MATCH_SCORE
+from embedding_index import SEMANTIC_MIN_SCORE
+
+# Tiers in cost order; a question only reaches the model when the FAQ tiers
+# could not answer it with enough confidence
+TIER_EXACT = 'exact'
+TIER_LEXICAL = 'lexical'
+TIER_SEMANTIC = 'semantic'
+TIER_GENERATIVE = 'generative'
+TIER_FALLBACK = 'fallback'
+
+DEFAULT_THRESHOLDS = {
+    TIER_EXACT: 1.0,
+    TIER_LEXICAL: MIN_MATCH_SCORE,
+    TIER_SEMANTIC: SEMANTIC_MIN_SCORE,
+    TIER_GENERATIVE: 0.0,
+}
+
+# The model reports no score of its own
+GENERATIVE_CONFIDENCE = 0.5
+
+# Rule-based answers are streamed this many words at a time
+STREAM_CHUNK_WORDS = 8
+
+# A tier returns (answer, confidence, intent), or (None, 0, None) when it has
+# nothing; FAQ tiers report the matched entry's precomputed intent
+TierFn = Callable[[str], Tuple[Optional[str], float, Optional[str]]]
+# A streaming tier returns an iterator of text pieces, or None
+StreamFn = Callable[[str], Optional[Iterator[str]]]
+
+
+class CascadeTier(NamedTuple):
+    name: str
+    answer_fn: TierFn
+    threshold: float
+
+
+class CascadeResult(NamedTuple):
+    answer: str
+    confidence: float
+    tier: str
+    # Seconds spent in each tier that ran, in order
+    tier_times: Dict[str, float]
+    response_time: float
+    # Seconds until the first piece of the answer was available
+    first_token_time: Optional[float] = None
+    # Intent of the FAQ entry that answered; None for generated and fallback answers
+    intent: Optional[str] = None
+
+
+def iter_chunks(text: str, words_per_chunk: int = STREAM_CHUNK_WORDS) -> Iterator[str]:
+    """Split an answer into pieces of a few words, keeping the original spacing"""
+    words = text.split(' ')
+    for start in range(0, len(words), words_per_chunk):
+        chunk = ' '.join(words[start:start + words_per_chunk])
+        yield chunk if start + words_per_chunk >= len(words) else chunk + ' '
+
+
+class StreamedAnswer:
+    """Iterator over the pieces of one cascade answer.
+
+    ``result`` is set once the iterator is exhausted.
+    """
+
+    def __init__(self, cascade: 'AnswerCascade', question: str):
+        self.result: Optional[CascadeResult] = None
+        self._chunks = cascade._stream(question, self)
+
+    def __iter__(self):
+        return self._chunks
+
+
+class AnswerCascade:
+    """Runs answer tiers cheapest first and stops at the first confident one.
+
+    A tier whose answer scores below its threshold does not end the cascade,
+    but its answer is kept; if no later tier clears its threshold the best
+    such answer is returned before falling back to ``fallback_fn``.
+
+    ``stream`` runs the same tiers but replaces the one named in
+    ``stream_tier`` (``(name, stream_fn, confidence)``) with its streaming
+    version, so generated text is passed on as it is produced.
+    """
+
+    def __init__(self, tiers: List[CascadeTier], fallback_fn: Callable[[str], Tuple[str, float]],
+                 stream_tier: Optional[Tuple[str, StreamFn, float]] = None):
+        self.tiers = tiers
+        self.fallback_fn = fallback_fn
+        self.stream_tier = stream_tier
+
+    def answer(self, question: str) -> CascadeResult:
+        """Answer a question and record which tier produced it"""
+        start_time = time.perf_counter()
+        tier_times = {}
+        cleared, best = self._run_tiers(question, self.tiers, tier_times)
+        answer, confidence, tier, intent = cleared or best or self._fallback(question, tier_times)
+        return CascadeResult(answer, confidence, tier, tier_times, time.perf_counter() - start_time, intent=intent)
+
+    def stream(self, question: str) -> StreamedAnswer:
+        """Answer a question as an iterator of text pieces"""
+        return StreamedAnswer(self, question)
+
+    def _stream(self, question: str, streamed: StreamedAnswer) -> Iterator[str]:
+        start_time = time.perf_counter()
+        tier_times = {}
+        stream_name = self.stream_tier[0] if self.stream_tier else None
+        tiers = [tier for tier in self.tiers if tier.name != stream_name]
+
+        cleared, best = self._run_tiers(question, tiers, tier_times)
+        chunks = None
+        if cleared is None and self.stream_tier is not None:
+            tier_start = time.perf_counter()
+            chunks = self._open_stream(question)
+            tier_times[stream_name] = time.perf_counter() - tier_start
+            if chunks is not None:
+                found = (None, self.stream_tier[2], stream_name, None)
+        if chunks is None:
+            found = cleared or best or self._fallback(question, tier_times)
+            chunks = iter_chunks(found[0])
+
+        pieces = []
+        first_token_time = None
+        try:
+            for chunk in chunks:
+                if first_token_time is None:
+                    first_token_time = time.perf_counter() - start_time
+                pieces.append(chunk)
+                yield chunk
+        except Exception:
+            # A generation that fails midway keeps the text produced so far
+            pass
+        if found[2] == stream_name:
+            tier_times[stream_name] = time.perf_counter() - tier_start
+
+        streamed.result = CascadeResult(''.join(pieces), found[1], found[2], tier_times,
+                                        time.perf_counter() - start_time, first_token_time, found[3])
+
+    def _open_stream(self, question: str) -> Optional[Iterator[str]]:
+        """Start the streaming tier; None if it has nothing to say"""
+        _, stream_fn, _ = self.stream_tier
+        try:
+            chunks = stream_fn(question)
+            if chunks is None:
+                return None
+            chunks = iter(chunks)
+            # Wait for the first piece so an empty or failing stream can
+            # still fall back to the rule-based answers
+            first = next(chunks)
+        except Exception:
+            return None
+
+        def replay():
+            yield first
+            yield from chunks
+        return replay()
+
+    def _run_tiers(self, question: str, tiers: List[CascadeTier],
+                   tier_times: Dict[str, float]) -> Tuple[Optional[Tuple], Optional[Tuple]]:
+        """First (answer, confidence, tier, intent) over its threshold, and the best one below"""
+        best = None
+        for tier in tiers:
+            tier_start = time.perf_counter()
+            try:
+                answer, confidence, intent = tier.answer_fn(question)
+            except Exception:
+                # A failing tier (model timeout, missing index) is skipped
+                answer, confidence, intent = None, 0, None
+            tier_times[tier.name] = time.perf_counter() - tier_start
+
+            if answer is None:
+                continue
+            if confidence >= tier.threshold:
+                return (answer, confidence, tier.name, intent), best
+            if best is None or confidence > best[1]:
+                best = (answer, confidence, tier.name, intent)
+        return None, best
+
+    def _fallback(self, question: str, tier_times: Dict[str, float]) -> Tuple[str, float, str, None]:
+        tier_start = time.perf_counter()
+        answer, confidence = self.fallback_fn(question)
+        tier_times[TIER_FALLBACK] = time.perf_counter() - tier_start
+        return answer, confidence, TIER_FALLBACK, None
+
+
+def build_faq_cascade(faq_index, semantic_fn: Optional[Callable] = None, generate_fn: Optional[Callable] = None,
+                      thresholds: Optional[Dict[str, float]] = None,
+                      stream_fn: Optional[StreamFn] = None) -> AnswerCascade:
+    """Exact, lexical, semantic and generative tiers over one FAQ index.
+
+    ``semantic_fn`` returns ``(entry_id, score)`` and ``generate_fn`` returns
+    the generated text or None; either tier is left out when not given.
+    ``stream_fn`` is the streaming version of ``generate_fn``.
+    """
+    thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+
+    def entry(doc_id, score):
+        if doc_id is None:
+            return None, 0, None
+        return faq_index.faq_data[doc_id]['response'], score, faq_index.intents[doc_id]
+
+    def exact(question):
+        return entry(faq_index.exact_match_id(question), 1.0)
+
+    def lexical(question):
+        return entry(*faq_index.best_match_id(question))
+
+    def semantic(question):
+        return entry(*semantic_fn(question))
+
+    def generative(question):
+        answer = generate_fn(question)
+        return (answer, GENERATIVE_CONFIDENCE, None) if answer else (None, 0, None)
+
+    tiers = [CascadeTier(TIER_EXACT, exact, thresholds[TIER_EXACT]),
+             CascadeTier(TIER_LEXICAL, lexical, thresholds[TIER_LEXICAL])]
+    if semantic_fn is not None:
+        tiers.append(CascadeTier(TIER_SEMANTIC, semantic, thresholds[TIER_SEMANTIC]))
+    if generate_fn is not None:
+        tiers.append(CascadeTier(TIER_GENERATIVE, generative, thresholds[TIER_GENERATIVE]))
+
+    stream_tier = (TIER_GENERATIVE, stream_fn, GENERATIVE_CONFIDENCE) if stream_fn is not None else None
+    return AnswerCascade(tiers, lambda question: faq_index.answer_from_match(question, None, 0), stream_tier)
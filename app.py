@@ -1,48 +1,68 @@
 import streamlit as st
 import io
+import os
+import importlib.util
 import json
-import time
+import uuid
 import random
 from datetime import datetime
 import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
+from faq_store import FAQStore
+from intent_classifier import classify_intent
+from inference_service import BatchedInferenceService
+from database import ChatDatabase, INTENT_SOURCE_ENTRY, INTENT_SOURCE_KEYWORD, INTENT_SOURCE_MODEL
+from model_backends import DEFAULT_ONNX_DIR, checkpoint_version, load_pipeline
+from model_loader import BackgroundModelLoader, LOADING as MODEL_LOADING
+from embedding_index import Embedder, SemanticIndex, SEMANTIC_MIN_SCORE
+from answer_cascade import TIER_GENERATIVE, build_faq_cascade
 
-try:
-    from transformers import pipeline
-    TRANSFORMERS_AVAILABLE = True
-except ImportError:
-    TRANSFORMERS_AVAILABLE = False
+# Heavy optional libraries are only checked for here and imported on first
+# use (model load, charts, CSV export, PDF upload) to keep cold starts fast
+TRANSFORMERS_AVAILABLE = importlib.util.find_spec("transformers") is not None
+if not TRANSFORMERS_AVAILABLE:
     st.warning("Transformers not available. Using fallback responses.")
 
-try:
-    import plotly.express as px
-    import pandas as pd
-    PLOTLY_AVAILABLE = True
-except ImportError:
-    PLOTLY_AVAILABLE = False
+PLOTLY_AVAILABLE = importlib.util.find_spec("plotly") is not None and importlib.util.find_spec("pandas") is not None
 
 PDF_AVAILABLE = False
 PDF_LIBRARY = None
 
-try:
-    import pdfplumber
+if importlib.util.find_spec("pdfplumber") is not None:
     PDF_AVAILABLE = True
     PDF_LIBRARY = "pdfplumber"
-except ImportError:
+else:
     st.warning("PDF processing not available. Install: pip install pdfplumber")
 
-# Load FAQ data
-@st.cache_data
-def load_faq_data():
+# Load FAQ data (shared across sessions, hot-reloaded when the file changes)
+@st.cache_resource
+def load_faq_store():
+    return FAQStore('college_faq.json')
+
+# The embedding model loads on a background thread like the answer model;
+# the semantic tier is left out until it is ready, and for good if it failed
+@st.cache_resource
+def load_embedder(model_name):
+    if not TRANSFORMERS_AVAILABLE:
+        return BackgroundModelLoader(None)
+    return BackgroundModelLoader(lambda: Embedder(model_name))
+
+# Only the current FAQ version is kept; a reload drops the old index and its matrix
+@st.cache_resource(max_entries=1)
+def load_semantic_index(faq_version, _faq_data):
+    """Memory-mapped FAQ embeddings for this FAQ version, if the index was built"""
     try:
-        with open('college_faq.json', 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        st.error("college_faq.json not found. Please ensure the file exists.")
-        return []
+        return SemanticIndex.load(_faq_data)
+    except Exception:
+        return None
 
-faq_data = load_faq_data()
+faq_store = load_faq_store()
+faq_store.refresh()
+# Read the snapshot once so this run sees one consistent FAQ version
+faq_snapshot = faq_store.snapshot
+faq_data = faq_snapshot.faq_data
+faq_index = faq_snapshot.index
 
 # Page config
 st.set_page_config(
@@ -51,6 +71,9 @@ st.set_page_config(
     layout="wide"
 )
 
+if faq_store.error:
+    st.error(faq_store.error)
+
 # CSS Styling
 st.markdown("""
 <style>
@@ -108,6 +131,25 @@ st.markdown("""
     50% { transform: scale(1.05); }
     100% { transform: scale(1); }
 }
+
+/* Typing animation for streamed answers (Settings > Typing Animation) */
+.answer-text.streaming::after {
+    content: '▍';
+    animation: caret-blink 1s steps(1) infinite;
+}
+
+.answer-text.reveal {
+    animation: answer-reveal 0.8s steps(40, end);
+}
+
+@keyframes caret-blink {
+    50% { opacity: 0; }
+}
+
+@keyframes answer-reveal {
+    from { clip-path: inset(0 100% 0 0); }
+    to { clip-path: inset(0 0 0 0); }
+}
 </style>
 """, unsafe_allow_html=True)
 
@@ -242,27 +284,77 @@ if 'user_preferences' not in st.session_state:
     }
 if 'show_analytics' not in st.session_state:
     st.session_state.show_analytics = False
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 
 # Header
 st.markdown(f'<div class="main-header"><h1>{t["title"]}</h1><p style="margin-top: 1rem; font-size: 1.1rem; opacity: 0.9;">{t["subtitle"]}</p></div>', unsafe_allow_html=True)
 
-# Load model
+# Load model (CHATBOT_MODEL_BACKEND=onnx runs the int8 export from model_backends.py).
+# CHATBOT_MODEL_PATH is the pytorch checkpoint; the onnx backend loads CHATBOT_ONNX_DIR
+MODEL_BACKEND = os.environ.get("CHATBOT_MODEL_BACKEND", "pytorch")
+MODEL_PATH = os.environ.get("CHATBOT_MODEL_PATH", "google/flan-t5-small")
+ONNX_DIR = os.environ.get("CHATBOT_ONNX_DIR", DEFAULT_ONNX_DIR)
+# Model answers are generated in micro-batches shared by all sessions. With
+# CHATBOT_STREAM_ANSWERS=1 they are shown as they are generated instead,
+# but each streamed generation then runs on its own
+STREAM_ANSWERS = os.environ.get("CHATBOT_STREAM_ANSWERS", "").lower() in ("1", "true", "yes")
+
+# The model loads on a background thread; until it is ready the answer
+# cascade runs without its generative tier
 @st.cache_resource
-def load_model():
-    if TRANSFORMERS_AVAILABLE:
-        try:
-            return pipeline("text2text-generation", model="google/flan-t5-small", local_files_only=True)
-        except Exception as e:
-            st.warning(f"Offline model not available. Using rule-based responses. Error: {e}")
-            return None
-    return None
+def load_model(backend=MODEL_BACKEND):
+    if not TRANSFORMERS_AVAILABLE:
+        return BackgroundModelLoader(None)
+    return BackgroundModelLoader(lambda: load_pipeline(backend, MODEL_PATH, ONNX_DIR))
 
-qa_pipeline = load_model() if TRANSFORMERS_AVAILABLE else None
+model_loader = load_model()
+qa_pipeline = model_loader.model
 
-if not TRANSFORMERS_AVAILABLE or qa_pipeline is None:
-    st.info("🔄 Running in offline mode with rule-based responses. All basic features are available!")
-else:
+# One ChatDatabase for all sessions; reruns lease WAL-mode connections from
+# its small pool (CHATBOT_DB_SYNCHRONOUS=FULL fsyncs every commit).
+# Conversation logging is write-behind so no session waits on a commit
+@st.cache_resource
+def load_database():
+    return ChatDatabase(synchronous=os.environ.get("CHATBOT_DB_SYNCHRONOUS", "NORMAL"), write_behind=True)
+
+# One micro-batching worker shared by every session; generated answers are
+# cached in SQLite so restarts and other workers reuse them until the
+# checkpoint changes
+@st.cache_resource
+def load_inference_service(_qa_pipeline):
+    model_dir = ONNX_DIR if MODEL_BACKEND == "onnx" else MODEL_PATH
+    model_version = checkpoint_version(model_dir) or getattr(
+        getattr(_qa_pipeline.model, 'config', None), '_commit_hash', None)
+    db = load_database()
+    service = BatchedInferenceService(_qa_pipeline, cache=db, model_version=model_version)
+    try:
+        # Answers generated by an earlier version of this checkpoint are stale
+        db.invalidate_generation_cache(service.model_id, keep_version=model_version)
+    except Exception:
+        pass
+    return service
+
+def generate_answer(question, timeout=30):
+    """Generate an answer with the model, batched with other sessions' requests"""
+    if qa_pipeline is None:
+        return None
+    return load_inference_service(qa_pipeline).generate(question, timeout=timeout)
+
+def stream_generated_answer(question, timeout=30):
+    """Stream model output piece by piece as it is generated"""
+    if qa_pipeline is None:
+        return None
+    return load_inference_service(qa_pipeline).stream(question, timeout=timeout)
+
+if model_loader.status == MODEL_LOADING:
+    st.info("⏳ AI model is loading in the background. Rule-based answers are available meanwhile.")
+elif model_loader.ready:
     st.success("🤖 AI model loaded successfully!")
+else:
+    if model_loader.error:
+        st.warning(f"Offline model not available. Using rule-based responses. Error: {model_loader.error}")
+    st.info("🔄 Running in offline mode with rule-based responses. All basic features are available!")
 
 # PDF processing function
 def extract_text_from_pdf(pdf_file):
@@ -272,6 +364,7 @@ def extract_text_from_pdf(pdf_file):
     
     try:
         if PDF_LIBRARY == "pdfplumber":
+            import pdfplumber
             with pdfplumber.open(io.BytesIO(pdf_file.read())) as pdf:
                 text = ""
                 for page in pdf.pages:
@@ -281,98 +374,99 @@ def extract_text_from_pdf(pdf_file):
         st.error(f"Error reading PDF: {str(e)}")
         return ""
 
-# Enhanced answer function with confidence scoring
-def get_answer_with_confidence(question):
-    start_time = time.time()
-    question_lower = question.lower().strip()
-    confidence = 0.0
-    
-    # First, try exact match from JSON data
-    for item in faq_data:
-        if question_lower == item['prompt'].lower().strip():
-            response_time = time.time() - start_time
-            return item['response'], 1.0, response_time
-    
-    # Enhanced keyword matching for better responses
-    best_match = None
-    max_score = 0
-    
-    for item in faq_data:
-        prompt_lower = item['prompt'].lower()
-        score = 0
-        
-        # Count matching words
-        question_words = set(question_lower.split())
-        prompt_words = set(prompt_lower.split())
-        common_words = question_words.intersection(prompt_words)
-        
-        if common_words:
-            score = len(common_words) / len(question_words.union(prompt_words))
-            
-        # Boost score for key terms
-        if 'scholarship' in question_lower and 'scholarship' in prompt_lower:
-            score += 0.5
-        if 'fee' in question_lower and 'fee' in prompt_lower:
-            score += 0.3
-            
-        if score > max_score and score > 0.2:
-            max_score = score
-            best_match = item['response']
-            confidence = score
-    
-    if best_match:
-        response_time = time.time() - start_time
-        return best_match, confidence, response_time
-    
-    # Specific fallback for scholarship questions
-    if 'scholarship' in question_lower:
-        response_time = time.time() - start_time
-        return "Scholarships are available for meritorious and economically weaker students. Please check the scholarship section on our website for detailed information and application procedures.", 0.7, response_time
-    
-    # General fallback response
-    response_time = time.time() - start_time
-    fallback_answer = "I'm sorry, I don't have specific information about that. Please contact our admissions office at admissions@college.edu or call +91-1234567890 for detailed assistance."
-    return fallback_answer, 0.3, response_time
-
-# Keep original get_answer for backward compatibility
-def get_answer(question):
-    answer, confidence, response_time = get_answer_with_confidence(question)
-    return answer
-
-def classify_intent(question):
-    question_lower = question.lower()
-    
-    # Check if question exists in FAQ data
-    for item in faq_data:
-        if question_lower in item['prompt'].lower() or item['prompt'].lower() in question_lower:
-            # Classify based on content
-            prompt_lower = item['prompt'].lower()
-            if any(word in prompt_lower for word in ['fee', 'cost', 'payment', 'money']):
-                return 'fees'
-            elif any(word in prompt_lower for word in ['date', 'deadline', 'when', 'time']):
-                return 'dates'
-            elif any(word in prompt_lower for word in ['eligibility', 'criteria', 'requirement']):
-                return 'eligibility'
-            elif any(word in prompt_lower for word in ['course', 'program', 'degree']):
-                return 'courses'
-            elif any(word in prompt_lower for word in ['admission', 'apply', 'process']):
-                return 'admission'
-    
-    # Fallback to original classification
-    intents = {
-        'fees': ['fee', 'cost', 'payment', 'money', 'scholarship'],
-        'dates': ['date', 'deadline', 'when', 'time', 'exam', 'result'],
-        'eligibility': ['eligibility', 'criteria', 'requirement', 'qualify'],
-        'courses': ['course', 'program', 'degree', 'branch', 'subject'],
-        'admission': ['admission', 'apply', 'process', 'form'],
-        'hostel': ['hostel', 'accommodation', 'room'],
-        'placement': ['placement', 'job', 'career', 'company']
-    }
-    
-    for intent, keywords in intents.items():
-        if any(word in question_lower for word in keywords):
-            return intent
-    return 'general'
+# Learned intent model (python -m intent_model); the keyword classifier
+# answers when it is missing or not confident
+INTENT_MODEL_PATH = os.environ.get("CHATBOT_INTENT_MODEL", "intent_model.npz")
+INTENT_MIN_CONFIDENCE = 0.5
+
+# Keyed on the file's mtime so a retrained model is picked up without a restart
+@st.cache_resource(max_entries=1)
+def load_intent_model(path, mtime):
+    try:
+        from intent_model import IntentModel
+        return IntentModel.load(path)
+    except Exception:
+        return None
+
+def detect_intent(question):
+    """(intent, source) from the learned model when confident, else the keyword rules"""
+    try:
+        mtime = os.stat(INTENT_MODEL_PATH).st_mtime_ns
+    except OSError:
+        mtime = None
+    model = load_intent_model(INTENT_MODEL_PATH, mtime) if mtime is not None else None
+    if model is not None:
+        intent, probability = model.classify(question)
+        if probability >= INTENT_MIN_CONFIDENCE:
+            return intent, INTENT_SOURCE_MODEL
+    return classify_intent(question), INTENT_SOURCE_KEYWORD
+
+def answer_intent(result, question):
+    """(intent, source) of an answer: the matched entry's intent, else a classifier's"""
+    if result.intent:
+        return result.intent, INTENT_SOURCE_ENTRY
+    return detect_intent(question)
+
+semantic_index = load_semantic_index(faq_snapshot.version, faq_data) if TRANSFORMERS_AVAILABLE else None
+embedder_loader = load_embedder(semantic_index.model_name) if semantic_index is not None else None
+
+def semantic_match(question):
+    """Id of the nearest FAQ entry by embedding similarity, or (None, 0) below threshold"""
+    results = semantic_index.search(embedder_loader.model.encode([question])[0])
+    if results and results[0][1] >= SEMANTIC_MIN_SCORE:
+        return results[0]
+    return None, 0
+
+# Exact match table, keyword scoring over the inverted index, embedding
+# search for paraphrases, and the model only for what those cannot answer
+answer_cascade = build_faq_cascade(
+    faq_index,
+    semantic_fn=semantic_match if embedder_loader is not None and embedder_loader.ready else None,
+    generate_fn=generate_answer if model_loader.ready else None,
+    stream_fn=stream_generated_answer if model_loader.ready else None,
+)
+
+def answer_question(question):
+    """Answer through the cascade; the result records the tier and per-tier timings"""
+    return answer_cascade.answer(question)
+
+def answer_box_html(text, css_class=""):
+    return f"""
+        <div style="
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            color: white;
+            padding: 1.5rem;
+            border-radius: 15px;
+            margin: 1rem 0;
+        ">
+            <div class="answer-text {css_class}" style="font-size: 1.1rem; line-height: 1.6;">
+                {text}
+            </div>
+        </div>
+        """
+
+def render_answer(question):
+    """Render the answer box (streamed when STREAM_ANSWERS is on); returns the CascadeResult"""
+    animate = st.session_state.user_preferences.get('typing_animation', True)
+    placeholder = st.empty()
+    if animate:
+        placeholder.markdown(answer_box_html("", "streaming"), unsafe_allow_html=True)
+    if not STREAM_ANSWERS:
+        result = answer_question(question)
+        placeholder.markdown(answer_box_html(result.answer, "reveal" if animate else ""), unsafe_allow_html=True)
+        # Shown all at once, so the first token arrives with the whole answer
+        return result._replace(first_token_time=result.response_time)
+    
+    streamed = answer_cascade.stream(question)
+    text = ""
+    for chunk in streamed:
+        text += chunk
+        placeholder.markdown(answer_box_html(text, "streaming" if animate else ""), unsafe_allow_html=True)
+    # Only model output was typed out as it arrived; FAQ answers get the
+    # typing effect client-side
+    final_class = "reveal" if animate and streamed.result.tier != TIER_GENERATIVE else ""
+    placeholder.markdown(answer_box_html(text, final_class), unsafe_allow_html=True)
+    return streamed.result
 
 # Enhanced chat interface
 st.markdown('<div class="chat-container">', unsafe_allow_html=True)
@@ -419,6 +513,10 @@ if st.session_state.get('show_analytics', False):
         avg_response_time = sum(st.session_state.analytics['response_times']) / len(st.session_state.analytics['response_times']) if st.session_state.analytics['response_times'] else 0
         st.metric("Avg Response Time", f"{avg_response_time:.2f}s")
     
+    if PLOTLY_AVAILABLE:
+        import plotly.express as px
+        import pandas as pd
+    
     # Intent distribution chart
     if PLOTLY_AVAILABLE and st.session_state.analytics['intents_detected']:
         try:
@@ -440,7 +538,7 @@ if st.session_state.get('show_analytics', False):
             st.error(f"Language chart error: {e}")
     
     # Response time trend
-    if st.session_state.analytics['response_times']:
+    if PLOTLY_AVAILABLE and st.session_state.analytics['response_times']:
         try:
             response_times = st.session_state.analytics['response_times'][-20:]  # Last 20 responses
             fig_time = px.line(x=range(len(response_times)), y=response_times, 
@@ -457,34 +555,21 @@ if st.session_state.get('show_analytics', False):
 
 # Main chat processing
 if user_input:
-    # Show typing indicator
-    with st.spinner("🤔 Thinking..."):
-        time.sleep(0.5)  # Simulate processing time
-        
-    intent = classify_intent(user_input)
-    answer, confidence, response_time = get_answer_with_confidence(user_input)
-    
-    # Display intent
-    st.info(f"🎯 {t['detected_intent']} **{intent.title()}**")
+    # Filled in once retrieval has found the answer's FAQ entry
+    intent_slot = st.empty()
     
     # Display answer with Streamlit components
     st.markdown("### 🤖 Answer:")
     
-    # Answer in a nice container
+    # Answer in a nice container, filled in as it streams when streaming is on
     with st.container():
-        st.markdown(f"""
-        <div style="
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 1.5rem;
-            border-radius: 15px;
-            margin: 1rem 0;
-        ">
-            <div style="font-size: 1.1rem; line-height: 1.6;">
-                {answer}
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
+        result = render_answer(user_input)
+    answer, confidence, response_time = result.answer, result.confidence, result.response_time
+    # The matched entry's precomputed intent; classify only when no entry matched
+    intent, intent_source = answer_intent(result, user_input)
+    
+    # Display intent
+    intent_slot.info(f"🎯 {t['detected_intent']} **{intent.title()}**")
     
     # Metrics in columns
     col1, col2, col3 = st.columns(3)
@@ -492,9 +577,11 @@ if user_input:
         confidence_emoji = "🟢" if confidence > 0.7 else "🟡" if confidence > 0.5 else "🔴"
         st.metric("Confidence", f"{confidence:.0%}", delta=confidence_emoji)
     with col2:
-        st.metric("Response Time", f"{response_time:.2f}s")
+        first_token_time = result.first_token_time or 0
+        st.metric("Response Time", f"{response_time:.2f}s", delta=f"first token {first_token_time:.2f}s", delta_color="off")
     with col3:
         st.metric("Category", intent.title())
+    st.caption(f"Answered by: {result.tier} · " + " · ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in result.tier_times.items()))
     
     # Rating system - Enhanced UI with gradients and colors
     st.markdown("**⭐ Rate this response:**")
@@ -677,6 +764,11 @@ if user_input:
         # Add to analytics only once
         if current_rating not in st.session_state.analytics['user_ratings']:
             st.session_state.analytics['user_ratings'].append(current_rating)
+        
+        # Store the rating with the logged conversation (feeds the daily rollups)
+        if st.session_state.get(f"saved_{rating_key}") != current_rating:
+            load_database().rate_conversation(st.session_state.session_id, user_input, current_rating)
+            st.session_state[f"saved_{rating_key}"] = current_rating
     
     # Update analytics
     st.session_state.analytics['questions_asked'] += 1
@@ -691,6 +783,9 @@ if user_input:
         'intent': intent,
         'confidence': confidence,
         'response_time': response_time,
+        'tier': result.tier,
+        'tier_times': result.tier_times,
+        'first_token_time': result.first_token_time,
         'rating': current_rating,
         'timestamp': datetime.now().isoformat()
     }
@@ -706,6 +801,10 @@ if user_input:
         st.session_state.conversation_history[existing_index] = conversation_entry
     else:
         st.session_state.conversation_history.append(conversation_entry)
+        # Logged questions are the training data for the intent model; the
+        # source keeps the model from training on its own predictions
+        load_database().save_conversation(st.session_state.session_id, user_input, answer, intent, language,
+                                          intent_source=intent_source)
 
 st.markdown('</div>', unsafe_allow_html=True)
 
@@ -763,28 +862,17 @@ for q in t["quick_questions_list"]:
 
 # Handle quick question clicks
 if hasattr(st.session_state, 'temp_question'):
-    intent = classify_intent(st.session_state.temp_question)
-    answer, confidence, response_time = get_answer_with_confidence(st.session_state.temp_question)
-    
-    # Display intent
-    st.info(f"🎯 {t['detected_intent']} **{intent.title()}**")
+    intent_slot = st.empty()
     
     # Display answer
     st.markdown("### 🤖 Answer:")
     with st.container():
-        st.markdown(f"""
-        <div style="
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 1.5rem;
-            border-radius: 15px;
-            margin: 1rem 0;
-        ">
-            <div style="font-size: 1.1rem; line-height: 1.6;">
-                {answer}
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
+        result = render_answer(st.session_state.temp_question)
+    answer, confidence, response_time = result.answer, result.confidence, result.response_time
+    intent, intent_source = answer_intent(result, st.session_state.temp_question)
+    
+    # Display intent
+    intent_slot.info(f"🎯 {t['detected_intent']} **{intent.title()}**")
     
     # Metrics for quick question
     col1, col2, col3 = st.columns(3)
@@ -792,9 +880,11 @@ if hasattr(st.session_state, 'temp_question'):
         confidence_emoji = "🟢" if confidence > 0.7 else "🟡" if confidence > 0.5 else "🔴"
         st.metric("Confidence", f"{confidence:.0%}", delta=confidence_emoji)
     with col2:
-        st.metric("Response Time", f"{response_time:.2f}s")
+        first_token_time = result.first_token_time or 0
+        st.metric("Response Time", f"{response_time:.2f}s", delta=f"first token {first_token_time:.2f}s", delta_color="off")
     with col3:
         st.metric("Category", intent.title())
+    st.caption(f"Answered by: {result.tier} · " + " · ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in result.tier_times.items()))
     
     # Rating for quick question - Enhanced UI with gradients
     st.markdown("**⭐ Rate this response:**")
@@ -911,10 +1001,16 @@ if hasattr(st.session_state, 'temp_question'):
         'intent': intent,
         'confidence': confidence,
         'response_time': response_time,
+        'tier': result.tier,
+        'tier_times': result.tier_times,
+        'first_token_time': result.first_token_time,
         'rating': rating,
         'timestamp': datetime.now().isoformat()
     })
     
+    load_database().save_conversation(st.session_state.session_id, st.session_state.temp_question, answer, intent, language,
+                                      rating=rating or None, intent_source=intent_source)
+    
     del st.session_state.temp_question
     st.rerun()
 
@@ -1038,6 +1134,7 @@ if st.session_state.conversation_history:
             )
         elif export_format == "CSV":
             if PLOTLY_AVAILABLE:
+                import pandas as pd
                 df = pd.DataFrame(st.session_state.conversation_history)
                 csv_data = df.to_csv(index=False)
                 st.sidebar.download_button(
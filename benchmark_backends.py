@@ -0,0 +1,89 @@
+import sys
+import json
+import time
+import resource
+import argparse
+import subprocess
+from statistics import median
+
+from model_backends import BACKENDS, DEFAULT_MODEL, DEFAULT_ONNX_DIR, load_pipeline
+
+
+def _rss_mb() -> float:
+    """Peak resident memory of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_backend(backend, model_path, onnx_dir, questions, batch_size, max_new_tokens):
+    """Measure load time, per-question latency, batched throughput and peak RSS"""
+    start = time.perf_counter()
+    qa_pipeline = load_pipeline(backend, model_path, onnx_dir)
+    load_seconds = time.perf_counter() - start
+    prompts = [f"### Question: {q}" for q in questions]
+
+    qa_pipeline(prompts[0], max_new_tokens=max_new_tokens)  # warm-up
+
+    latencies = []
+    for prompt in prompts:
+        start = time.perf_counter()
+        qa_pipeline(prompt, max_new_tokens=max_new_tokens)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    qa_pipeline(prompts, batch_size=batch_size, max_new_tokens=max_new_tokens)
+    batch_seconds = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'backend': backend,
+        'load_s': round(load_seconds, 2),
+        'p50_ms': round(median(latencies) * 1000, 1),
+        'p95_ms': round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 1),
+        'sequential_qps': round(len(latencies) / sum(latencies), 2),
+        'batched_qps': round(len(prompts) / batch_seconds, 2),
+        'peak_rss_mb': round(_rss_mb(), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare PyTorch and int8 ONNX Runtime answer backends on CPU")
+    parser.add_argument('--model', default=DEFAULT_MODEL)
+    parser.add_argument('--onnx-dir', default=DEFAULT_ONNX_DIR)
+    parser.add_argument('--faq', default='college_faq.json', help="Questions are the FAQ prompts")
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--max-new-tokens', type=int, default=64)
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument('--worker', choices=BACKENDS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    with open(args.faq, 'r', encoding='utf-8') as f:
+        questions = [item['prompt'] for item in json.load(f)]
+
+    if args.worker:
+        result = run_backend(args.worker, args.model, args.onnx_dir, questions, args.batch_size, args.max_new_tokens)
+        print(json.dumps(result))
+        return
+
+    # Each backend runs in its own process so peak RSS is not shared
+    results = []
+    for backend in args.backends:
+        cmd = [sys.executable, __file__, '--worker', backend, '--model', args.model, '--onnx-dir', args.onnx_dir,
+               '--faq', args.faq, '--batch-size', str(args.batch_size), '--max-new-tokens', str(args.max_new_tokens)]
+        output = subprocess.run(cmd, capture_output=True, text=True)
+        if output.returncode != 0:
+            print(f"{backend}: failed\n{output.stderr.strip()}", file=sys.stderr)
+            continue
+        results.append(json.loads(output.stdout.strip().splitlines()[-1]))
+
+    if not results:
+        sys.exit(1)
+    columns = list(results[0])
+    print(" | ".join(f"{c:>14}" for c in columns))
+    for result in results:
+        print(" | ".join(f"{str(result[c]):>14}" for c in columns))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+import re
+import math
+from typing import List, Dict, Iterable
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def word_tokens(text: str) -> List[str]:
+    """Lowercase word tokens with punctuation removed"""
+    return _WORD_RE.findall(text.lower())
+
+
+class BM25Index:
+    """Sparse BM25 term-weight matrix over FAQ prompts.
+
+    Weights are stored term-major (CSR over terms), so scoring a query is a
+    single gather of the posting slices followed by one ``np.bincount``,
+    i.e. a sparse dot product between the query vector and the matrix.
+    """
+
+    def __init__(self, prompts: List[str], k1: float = 1.2, b: float = 0.75):
+        if not NUMPY_AVAILABLE:
+            raise ImportError("BM25 ranking requires numpy. Install: pip install numpy")
+
+        self.k1 = k1
+        self.b = b
+        self.prompts_lower = [p.lower() for p in prompts]
+        self.num_docs = len(prompts)
+
+        doc_tokens = [word_tokens(p) for p in prompts]
+        doc_lengths = np.array([len(t) for t in doc_tokens], dtype=np.float32)
+        avg_length = float(doc_lengths.mean()) if self.num_docs else 0.0
+        self.avg_length = avg_length
+
+        # term -> {doc_id: tf}
+        term_freqs: Dict[str, Dict[int, int]] = {}
+        for doc_id, tokens in enumerate(doc_tokens):
+            for token in tokens:
+                postings = term_freqs.setdefault(token, {})
+                postings[doc_id] = postings.get(doc_id, 0) + 1
+
+        self.vocab = {term: term_id for term_id, term in enumerate(sorted(term_freqs))}
+        self.idf = np.zeros(len(self.vocab), dtype=np.float32)
+        indptr = [0]
+        doc_ids = []
+        weights = []
+
+        for term, term_id in self.vocab.items():
+            postings = term_freqs[term]
+            idf = self._idf(len(postings))
+            self.idf[term_id] = idf
+            for doc_id, tf in sorted(postings.items()):
+                norm = k1 * (1 - b + b * doc_lengths[doc_id] / avg_length) if avg_length else k1
+                doc_ids.append(doc_id)
+                weights.append(idf * tf * (k1 + 1) / (tf + norm))
+            indptr.append(len(doc_ids))
+
+        self.indptr = np.array(indptr, dtype=np.int64)
+        self.doc_ids = np.array(doc_ids, dtype=np.int32)
+        self.weights = np.array(weights, dtype=np.float32)
+        self.long_prompt_mask = np.array([len(p) > 50 for p in self.prompts_lower], dtype=bool)
+        self._substring_masks: Dict[str, 'np.ndarray'] = {}
+
+    def _idf(self, df: int) -> float:
+        return math.log(1 + (self.num_docs - df + 0.5) / (df + 0.5))
+
+    def substring_mask(self, term: str) -> 'np.ndarray':
+        """Boolean mask of prompts containing ``term`` (cached per term)"""
+        mask = self._substring_masks.get(term)
+        if mask is None:
+            mask = np.array([term in p for p in self.prompts_lower], dtype=bool)
+            self._substring_masks[term] = mask
+        return mask
+
+    def score(self, question: str) -> 'np.ndarray':
+        """BM25 scores for every prompt, normalized to [0, 1]"""
+        tokens = word_tokens(question)
+        terms = set(tokens)
+        scores = np.zeros(self.num_docs, dtype=np.float32)
+        if not terms or not self.num_docs:
+            return scores
+
+        # Normalize by the score the question would get against itself, so
+        # a verbatim prompt scores ~1.0 like it does under Jaccard. Unknown
+        # terms count at maximum idf and pull the score down.
+        query_norm = self.k1 * (1 - self.b + self.b * len(tokens) / self.avg_length) if self.avg_length else self.k1
+        term_bound = (self.k1 + 1) / (1 + query_norm)
+        upper_bound = 0.0
+        slices = []
+        for term in terms:
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                upper_bound += self._idf(0) * term_bound
+                continue
+            upper_bound += float(self.idf[term_id]) * term_bound
+            slices.append((self.indptr[term_id], self.indptr[term_id + 1]))
+
+        if slices:
+            positions = np.concatenate([np.arange(start, end) for start, end in slices])
+            scores = np.bincount(
+                self.doc_ids[positions], weights=self.weights[positions], minlength=self.num_docs
+            ).astype(np.float32)
+
+        return (scores / upper_bound).clip(max=1.0) if upper_bound else scores
+
+    def context_boost(self, topics: Iterable[str], courses: Iterable[str], stage: str) -> 'np.ndarray':
+        """Vectorized version of the per-item context boosts"""
+        boost = np.zeros(self.num_docs)
+        for topic in topics:
+            boost += 0.2 * self.substring_mask(topic)
+        for course in courses:
+            boost += 0.3 * self.substring_mask(course)
+        if stage == 'detailed':
+            boost += 0.1 * self.long_prompt_mask
+        return boost
+
+    @staticmethod
+    def top_k(scores: 'np.ndarray', k: int) -> List[int]:
+        """Indices of the k highest scores, best first, via partial selection"""
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top], kind='stable')].tolist()
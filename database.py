@@ -1,102 +1,805 @@
 import sqlite3
 import json
-from datetime import datetime
-import pandas as pd
+import hashlib
+import time
+import queue
+import atexit
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from faq_index import normalize_prompt
+from response_cache import ResponseCache
+
+SYNCHRONOUS_LEVELS = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+# Where a logged intent came from: the matched FAQ entry, the keyword
+# rules, or the learned intent model
+INTENT_SOURCE_ENTRY = 'entry'
+INTENT_SOURCE_KEYWORD = 'keyword'
+INTENT_SOURCE_MODEL = 'model'
+# Ratings at or above this make a non-model label usable for training
+TRAINING_MIN_RATING = 4
+
+# Attempts per write-behind batch before its rows are dropped (and counted)
+WRITE_RETRIES = 3
+
+_STOP = object()
+_FLUSH = object()
+
+# Schema changes after the base tables in init_database, applied in order.
+# Each entry is (version, statements); append new ones, never edit old ones
+MIGRATIONS = [
+    (1, [
+        # Dashboard filters and groupings
+        "CREATE INDEX IF NOT EXISTS idx_conversations_timestamp ON conversations (timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_conversations_session ON conversations (session_id)",
+        "CREATE INDEX IF NOT EXISTS idx_conversations_intent_language ON conversations (intent, language)",
+        # Calendar day for daily grouping, computed on read and indexed
+        "ALTER TABLE conversations ADD COLUMN day TEXT GENERATED ALWAYS AS (DATE(timestamp)) VIRTUAL",
+        "CREATE INDEX IF NOT EXISTS idx_conversations_day ON conversations (day)",
+    ]),
+    (2, [
+        # Per-day rollups kept current by triggers, so analytics reads never
+        # scan conversations. Missing intent/language/session is stored as ''
+        "ALTER TABLE conversations ADD COLUMN rating INTEGER",
+        "ALTER TABLE analytics ADD COLUMN rating_sum INTEGER DEFAULT 0",
+        "ALTER TABLE analytics ADD COLUMN rating_count INTEGER DEFAULT 0",
+        # Never written before this migration; rebuilt below, one row per day
+        "DELETE FROM analytics",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_analytics_date ON analytics (date)",
+        '''
+            CREATE TABLE daily_intent_counts (
+                day TEXT NOT NULL,
+                intent TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, intent)
+            ) WITHOUT ROWID
+        ''',
+        '''
+            CREATE TABLE daily_language_counts (
+                day TEXT NOT NULL,
+                language TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, language)
+            ) WITHOUT ROWID
+        ''',
+        '''
+            CREATE TABLE daily_sessions (
+                day TEXT NOT NULL,
+                session_id TEXT NOT NULL,
+                questions INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, session_id)
+            ) WITHOUT ROWID
+        ''',
+        # Backfill from existing rows
+        '''
+            INSERT INTO daily_intent_counts (day, intent, count)
+            SELECT day, COALESCE(intent, ''), COUNT(*) FROM conversations
+            WHERE day IS NOT NULL GROUP BY 1, 2
+        ''',
+        '''
+            INSERT INTO daily_language_counts (day, language, count)
+            SELECT day, COALESCE(language, ''), COUNT(*) FROM conversations
+            WHERE day IS NOT NULL GROUP BY 1, 2
+        ''',
+        '''
+            INSERT INTO daily_sessions (day, session_id, questions)
+            SELECT day, COALESCE(session_id, ''), COUNT(*) FROM conversations
+            WHERE day IS NOT NULL GROUP BY 1, 2
+        ''',
+        '''
+            INSERT INTO analytics (date, total_questions, unique_users, avg_session_length, top_intent, rating_sum, rating_count)
+            SELECT s.day, SUM(s.questions), COUNT(*), AVG(s.questions),
+                   (SELECT i.intent FROM daily_intent_counts i WHERE i.day = s.day ORDER BY i.count DESC, i.intent LIMIT 1),
+                   0, 0
+            FROM daily_sessions s GROUP BY s.day
+        ''',
+        '''
+            CREATE TRIGGER conversations_rollup_insert AFTER INSERT ON conversations
+            WHEN NEW.day IS NOT NULL
+            BEGIN
+                INSERT INTO daily_intent_counts (day, intent, count) VALUES (NEW.day, COALESCE(NEW.intent, ''), 1)
+                    ON CONFLICT (day, intent) DO UPDATE SET count = count + 1;
+                INSERT INTO daily_language_counts (day, language, count) VALUES (NEW.day, COALESCE(NEW.language, ''), 1)
+                    ON CONFLICT (day, language) DO UPDATE SET count = count + 1;
+                INSERT INTO daily_sessions (day, session_id, questions) VALUES (NEW.day, COALESCE(NEW.session_id, ''), 1)
+                    ON CONFLICT (day, session_id) DO UPDATE SET questions = questions + 1;
+                INSERT INTO analytics (date, total_questions, unique_users, rating_sum, rating_count)
+                    VALUES (NEW.day, 0, 0, 0, 0) ON CONFLICT (date) DO NOTHING;
+                UPDATE analytics SET
+                    total_questions = total_questions + 1,
+                    unique_users = unique_users + (
+                        SELECT questions = 1 FROM daily_sessions
+                        WHERE day = NEW.day AND session_id = COALESCE(NEW.session_id, '')),
+                    avg_session_length = (total_questions + 1) * 1.0 / (unique_users + (
+                        SELECT questions = 1 FROM daily_sessions
+                        WHERE day = NEW.day AND session_id = COALESCE(NEW.session_id, ''))),
+                    top_intent = (
+                        SELECT intent FROM daily_intent_counts
+                        WHERE day = NEW.day ORDER BY count DESC, intent LIMIT 1),
+                    rating_sum = rating_sum + COALESCE(NEW.rating, 0),
+                    rating_count = rating_count + (NEW.rating IS NOT NULL)
+                WHERE date = NEW.day;
+            END
+        ''',
+        '''
+            CREATE TRIGGER conversations_rollup_rating AFTER UPDATE OF rating ON conversations
+            WHEN NEW.day IS NOT NULL
+            BEGIN
+                UPDATE analytics SET
+                    rating_sum = rating_sum + COALESCE(NEW.rating, 0) - COALESCE(OLD.rating, 0),
+                    rating_count = rating_count + (NEW.rating IS NOT NULL) - (OLD.rating IS NOT NULL)
+                WHERE date = NEW.day;
+            END
+        ''',
+        '''
+            CREATE TRIGGER conversations_rollup_delete AFTER DELETE ON conversations
+            WHEN OLD.day IS NOT NULL
+            BEGIN
+                UPDATE daily_intent_counts SET count = count - 1
+                    WHERE day = OLD.day AND intent = COALESCE(OLD.intent, '');
+                DELETE FROM daily_intent_counts
+                    WHERE day = OLD.day AND intent = COALESCE(OLD.intent, '') AND count <= 0;
+                UPDATE daily_language_counts SET count = count - 1
+                    WHERE day = OLD.day AND language = COALESCE(OLD.language, '');
+                DELETE FROM daily_language_counts
+                    WHERE day = OLD.day AND language = COALESCE(OLD.language, '') AND count <= 0;
+                UPDATE daily_sessions SET questions = questions - 1
+                    WHERE day = OLD.day AND session_id = COALESCE(OLD.session_id, '');
+                UPDATE analytics SET
+                    total_questions = total_questions - 1,
+                    unique_users = unique_users - (
+                        SELECT questions <= 0 FROM daily_sessions
+                        WHERE day = OLD.day AND session_id = COALESCE(OLD.session_id, '')),
+                    top_intent = (
+                        SELECT intent FROM daily_intent_counts
+                        WHERE day = OLD.day ORDER BY count DESC, intent LIMIT 1),
+                    rating_sum = rating_sum - COALESCE(OLD.rating, 0),
+                    rating_count = rating_count - (OLD.rating IS NOT NULL)
+                WHERE date = OLD.day;
+                DELETE FROM daily_sessions
+                    WHERE day = OLD.day AND session_id = COALESCE(OLD.session_id, '') AND questions <= 0;
+                UPDATE analytics SET avg_session_length =
+                    CASE WHEN unique_users > 0 THEN total_questions * 1.0 / unique_users ELSE 0 END
+                WHERE date = OLD.day;
+                DELETE FROM analytics WHERE date = OLD.day AND total_questions <= 0;
+            END
+        ''',
+    ]),
+    (3, [
+        # Running total of generation_cache.size_bytes, so the size cap is
+        # checked with one row read instead of a SUM over the whole cache
+        '''
+            CREATE TABLE generation_cache_size (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                total_bytes INTEGER NOT NULL DEFAULT 0
+            )
+        ''',
+        '''
+            INSERT INTO generation_cache_size (id, total_bytes)
+            SELECT 1, COALESCE(SUM(size_bytes), 0) FROM generation_cache
+        ''',
+        '''
+            CREATE TRIGGER generation_cache_size_insert AFTER INSERT ON generation_cache
+            BEGIN
+                UPDATE generation_cache_size SET total_bytes = total_bytes + NEW.size_bytes WHERE id = 1;
+            END
+        ''',
+        '''
+            CREATE TRIGGER generation_cache_size_update AFTER UPDATE OF size_bytes ON generation_cache
+            BEGIN
+                UPDATE generation_cache_size SET total_bytes = total_bytes + NEW.size_bytes - OLD.size_bytes WHERE id = 1;
+            END
+        ''',
+        '''
+            CREATE TRIGGER generation_cache_size_delete AFTER DELETE ON generation_cache
+            BEGIN
+                UPDATE generation_cache_size SET total_bytes = total_bytes - OLD.size_bytes WHERE id = 1;
+            END
+        ''',
+    ]),
+    (4, [
+        # All-time rollups next to the daily ones, so the dashboard totals
+        # cost the same however many days of history there are. Same rows
+        # and '' keys as migration 2
+        '''
+            CREATE TABLE conversation_totals (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                questions INTEGER NOT NULL DEFAULT 0,
+                sessions INTEGER NOT NULL DEFAULT 0,
+                rating_sum INTEGER NOT NULL DEFAULT 0,
+                rating_count INTEGER NOT NULL DEFAULT 0
+            )
+        ''',
+        '''
+            CREATE TABLE session_totals (
+                session_id TEXT PRIMARY KEY,
+                questions INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        ''',
+        '''
+            CREATE TABLE intent_totals (
+                intent TEXT PRIMARY KEY,
+                count INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        ''',
+        '''
+            CREATE TABLE language_totals (
+                language TEXT PRIMARY KEY,
+                count INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        ''',
+        # Backfill from the daily rollups (already exact)
+        '''
+            INSERT INTO session_totals (session_id, questions)
+            SELECT session_id, SUM(questions) FROM daily_sessions GROUP BY session_id
+        ''',
+        '''
+            INSERT INTO intent_totals (intent, count)
+            SELECT intent, SUM(count) FROM daily_intent_counts GROUP BY intent
+        ''',
+        '''
+            INSERT INTO language_totals (language, count)
+            SELECT language, SUM(count) FROM daily_language_counts GROUP BY language
+        ''',
+        '''
+            INSERT INTO conversation_totals (id, questions, sessions, rating_sum, rating_count)
+            SELECT 1, COALESCE(SUM(total_questions), 0), (SELECT COUNT(*) FROM session_totals),
+                   COALESCE(SUM(rating_sum), 0), COALESCE(SUM(rating_count), 0)
+            FROM analytics
+        ''',
+        '''
+            CREATE TRIGGER conversations_totals_insert AFTER INSERT ON conversations
+            WHEN NEW.day IS NOT NULL
+            BEGIN
+                INSERT INTO intent_totals (intent, count) VALUES (COALESCE(NEW.intent, ''), 1)
+                    ON CONFLICT (intent) DO UPDATE SET count = count + 1;
+                INSERT INTO language_totals (language, count) VALUES (COALESCE(NEW.language, ''), 1)
+                    ON CONFLICT (language) DO UPDATE SET count = count + 1;
+                INSERT INTO session_totals (session_id, questions) VALUES (COALESCE(NEW.session_id, ''), 1)
+                    ON CONFLICT (session_id) DO UPDATE SET questions = questions + 1;
+                UPDATE conversation_totals SET
+                    questions = questions + 1,
+                    sessions = sessions + (
+                        SELECT questions = 1 FROM session_totals WHERE session_id = COALESCE(NEW.session_id, '')),
+                    rating_sum = rating_sum + COALESCE(NEW.rating, 0),
+                    rating_count = rating_count + (NEW.rating IS NOT NULL)
+                WHERE id = 1;
+            END
+        ''',
+        '''
+            CREATE TRIGGER conversations_totals_rating AFTER UPDATE OF rating ON conversations
+            WHEN NEW.day IS NOT NULL
+            BEGIN
+                UPDATE conversation_totals SET
+                    rating_sum = rating_sum + COALESCE(NEW.rating, 0) - COALESCE(OLD.rating, 0),
+                    rating_count = rating_count + (NEW.rating IS NOT NULL) - (OLD.rating IS NOT NULL)
+                WHERE id = 1;
+            END
+        ''',
+        '''
+            CREATE TRIGGER conversations_totals_delete AFTER DELETE ON conversations
+            WHEN OLD.day IS NOT NULL
+            BEGIN
+                UPDATE intent_totals SET count = count - 1 WHERE intent = COALESCE(OLD.intent, '');
+                DELETE FROM intent_totals WHERE intent = COALESCE(OLD.intent, '') AND count <= 0;
+                UPDATE language_totals SET count = count - 1 WHERE language = COALESCE(OLD.language, '');
+                DELETE FROM language_totals WHERE language = COALESCE(OLD.language, '') AND count <= 0;
+                UPDATE session_totals SET questions = questions - 1 WHERE session_id = COALESCE(OLD.session_id, '');
+                UPDATE conversation_totals SET
+                    questions = questions - 1,
+                    sessions = sessions - (
+                        SELECT questions <= 0 FROM session_totals WHERE session_id = COALESCE(OLD.session_id, '')),
+                    rating_sum = rating_sum - COALESCE(OLD.rating, 0),
+                    rating_count = rating_count - (OLD.rating IS NOT NULL)
+                WHERE id = 1;
+                DELETE FROM session_totals WHERE session_id = COALESCE(OLD.session_id, '') AND questions <= 0;
+            END
+        ''',
+    ]),
+    (5, [
+        # NULL for rows logged before the source was recorded
+        "ALTER TABLE conversations ADD COLUMN intent_source TEXT",
+    ]),
+]
+
+_INSERT_CONVERSATION = '''
+    INSERT INTO conversations (session_id, question, answer, intent, language, user_email, timestamp, rating, intent_source)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Rates the latest matching question of a session
+_RATE_CONVERSATION = '''
+    UPDATE conversations SET rating = ?
+    WHERE id = (SELECT MAX(id) FROM conversations WHERE session_id = ? AND question = ?)
+'''
+
+# LRU bookkeeping for a generation cache hit
+_TOUCH_GENERATION = '''
+    UPDATE generation_cache SET hits = hits + 1, last_used = CURRENT_TIMESTAMP
+    WHERE prompt_key = ? AND model_id = ? AND params_hash = ?
+'''
+
+# An upsert rather than INSERT OR REPLACE: REPLACE deletes the old row
+# without firing the delete trigger, which would skew generation_cache_size
+_STORE_GENERATION = '''
+    INSERT INTO generation_cache (prompt_key, model_id, params_hash, model_version, answer, size_bytes)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT (prompt_key, model_id, params_hash) DO UPDATE SET
+        model_version = excluded.model_version, answer = excluded.answer, size_bytes = excluded.size_bytes,
+        hits = 0, created_at = CURRENT_TIMESTAMP, last_used = CURRENT_TIMESTAMP
+'''
+
+# Every dashboard aggregate in one statement, read from the all-time and
+# the last days' rollups only, so its cost does not grow with history. The
+# first column says which part of the summary a row belongs to
+_ANALYTICS_SUMMARY = '''
+    SELECT 'total', NULL, questions, rating_sum, rating_count, sessions, NULL FROM conversation_totals
+    UNION ALL
+    SELECT 'intent', intent, count, NULL, NULL, NULL, NULL FROM intent_totals
+    UNION ALL
+    SELECT 'language', language, count, NULL, NULL, NULL, NULL FROM language_totals
+    UNION ALL
+    SELECT * FROM (
+        SELECT 'day', date, total_questions, rating_sum, rating_count, unique_users, avg_session_length
+        FROM analytics ORDER BY date DESC LIMIT ?
+    )
+'''
 
 class ChatDatabase:
-    def __init__(self, db_path="chatbot.db"):
+    """SQLite storage shared by all sessions.
+    
+    Connections are leased from a pool of at most ``pool_size`` WAL-mode
+    connections, so readers do not block the writer and connections (with
+    their prepared statements) are reused across Streamlit reruns, which
+    mostly run on fresh threads. ``synchronous='NORMAL'``
+    skips the fsync on most commits; use 'FULL' to make every commit durable.
+    
+    With ``write_behind=True``, ``save_conversation`` only queues the row.
+    A background thread writes queued rows with one ``executemany`` per
+    transaction, every ``flush_rows`` rows or ``flush_interval_ms``. When
+    ``max_pending`` rows are waiting, callers block until the writer
+    catches up.
+    
+    ``get_analytics_summary`` results are cached for
+    ``analytics_ttl_seconds``, so every dashboard open on a shared instance
+    costs one query per interval.
+    """
+    
+    def __init__(self, db_path="chatbot.db", generation_cache_max_bytes=64 * 1024 * 1024,
+                 synchronous="NORMAL", busy_timeout_ms=5000, cached_statements=256, pool_size=8,
+                 write_behind=False, flush_rows=256, flush_interval_ms=200, max_pending=10000,
+                 analytics_ttl_seconds=5.0):
+        if synchronous.upper() not in SYNCHRONOUS_LEVELS:
+            raise ValueError(f"synchronous must be one of {SYNCHRONOUS_LEVELS}")
         self.db_path = db_path
+        self.generation_cache_max_bytes = generation_cache_max_bytes
+        self.synchronous = synchronous.upper()
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cached_statements = cached_statements
+        # Idle connections, most recently used first; the semaphore caps how
+        # many exist, so a burst of sessions waits instead of opening more
+        self._pool = queue.LifoQueue()
+        self._pool_slots = threading.BoundedSemaphore(pool_size)
+        # Every open connection, so close() can reach leased ones too
+        self._connections = []
+        self._connections_lock = threading.Lock()
         self.init_database()
+        
+        self._analytics_cache = ResponseCache(max_entries=8, ttl_seconds=analytics_ttl_seconds)
+        self._analytics_lock = threading.Lock()
+        
+        self.write_behind = write_behind
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval_ms / 1000
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self.flushes = 0
+        self.last_flush_lag = 0.0
+        self._writer = None
+        if write_behind:
+            self._pending = queue.Queue(maxsize=max_pending)
+            self._writer = threading.Thread(target=self._write_loop, name="chatdb-writer", daemon=True)
+            self._writer.start()
+            atexit.register(self.close)
+    
+    def _open_connection(self):
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout_ms / 1000,
+                               cached_statements=self.cached_statements, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        with self._connections_lock:
+            self._connections.append(conn)
+        return conn
+    
+    @contextmanager
+    def _connection(self):
+        """Lease a pooled connection for one operation (do not nest leases)"""
+        self._pool_slots.acquire()
+        try:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                conn = self._open_connection()
+            try:
+                yield conn
+            finally:
+                # Never hand the next caller someone else's open transaction
+                if conn.in_transaction:
+                    conn.rollback()
+                self._pool.put(conn)
+        finally:
+            self._pool_slots.release()
+    
+    def close(self):
+        """Flush queued rows, stop the writer and close every pooled connection"""
+        if self._writer is not None:
+            self._pending.put(_STOP)
+            self._writer.join()
+            self._writer = None
+            self.write_behind = False
+        with self._connections_lock:
+            connections = list(self._connections)
+            self._connections.clear()
+        for conn in connections:
+            conn.close()
+        self._pool = queue.LifoQueue()
     
     def init_database(self):
         """Initialize database tables"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Conversations table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS conversations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_id TEXT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                question TEXT,
-                answer TEXT,
-                intent TEXT,
-                language TEXT,
-                user_email TEXT
-            )
-        ''')
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            
+            # Conversations table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS conversations (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    question TEXT,
+                    answer TEXT,
+                    intent TEXT,
+                    language TEXT,
+                    user_email TEXT
+                )
+            ''')
+            
+            # Analytics table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS analytics (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    date DATE DEFAULT CURRENT_DATE,
+                    total_questions INTEGER DEFAULT 0,
+                    unique_users INTEGER DEFAULT 0,
+                    top_intent TEXT,
+                    avg_session_length REAL DEFAULT 0
+                )
+            ''')
+            
+            # Email queue table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS email_queue (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    recipient_email TEXT,
+                    subject TEXT,
+                    content TEXT,
+                    status TEXT DEFAULT 'pending',
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    sent_at DATETIME
+                )
+            ''')
+            
+            # Generated answer cache, shared by every worker process
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS generation_cache (
+                    prompt_key TEXT NOT NULL,
+                    model_id TEXT NOT NULL,
+                    params_hash TEXT NOT NULL,
+                    model_version TEXT,
+                    answer TEXT,
+                    size_bytes INTEGER DEFAULT 0,
+                    hits INTEGER DEFAULT 0,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    last_used DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (prompt_key, model_id, params_hash)
+                )
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_generation_cache_last_used
+                ON generation_cache (last_used)
+            ''')
+            
+            conn.commit()
+        self.migrate()
+    
+    def schema_version(self):
+        """Highest migration applied to this database (0 for none)"""
+        with self._connection() as conn:
+            return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+    
+    def migrate(self):
+        """Apply pending MIGRATIONS in order, each in its own transaction"""
+        with self._connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            conn.commit()
+            
+            for version, statements in MIGRATIONS:
+                # IMMEDIATE takes the write lock before the version check, so two
+                # processes starting together cannot both apply a migration
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    current = conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+                    if version <= current:
+                        conn.rollback()
+                        continue
+                    for statement in statements:
+                        conn.execute(statement)
+                    conn.execute("INSERT INTO schema_version (version) VALUES (?)", (version,))
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+    
+    @staticmethod
+    def _generation_key(prompt, params):
+        """Normalized prompt and a stable hash of the generation parameters"""
+        params_json = json.dumps(params or {}, sort_keys=True, default=str)
+        return normalize_prompt(prompt), hashlib.sha1(params_json.encode('utf-8')).hexdigest()
+    
+    def get_cached_generation(self, prompt, model_id, params=None, model_version=None):
+        """Return a cached generated answer, or None on miss"""
+        prompt_key, params_hash = self._generation_key(prompt, params)
+        with self._connection() as conn:
+            row = conn.execute('''
+                SELECT answer FROM generation_cache
+                WHERE prompt_key = ? AND model_id = ? AND params_hash = ? AND model_version IS ?
+            ''', (prompt_key, model_id, params_hash, model_version)).fetchone()
         
-        # Analytics table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS analytics (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date DATE DEFAULT CURRENT_DATE,
-                total_questions INTEGER DEFAULT 0,
-                unique_users INTEGER DEFAULT 0,
-                top_intent TEXT,
-                avg_session_length REAL DEFAULT 0
-            )
-        ''')
+        if row:
+            # With write-behind the touch is batched with the conversation
+            # writes, so a cache hit never takes the write lock itself
+            self._write(_TOUCH_GENERATION, (prompt_key, model_id, params_hash))
         
-        # Email queue table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS email_queue (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                recipient_email TEXT,
-                subject TEXT,
-                content TEXT,
-                status TEXT DEFAULT 'pending',
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                sent_at DATETIME
-            )
-        ''')
+        return row[0] if row else None
+    
+    def cache_generation(self, prompt, model_id, answer, params=None, model_version=None):
+        """Store a generated answer and evict least recently used rows over the size cap"""
+        prompt_key, params_hash = self._generation_key(prompt, params)
+        size_bytes = len(prompt_key.encode('utf-8')) + len(answer.encode('utf-8'))
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute(_STORE_GENERATION, (prompt_key, model_id, params_hash, model_version, answer, size_bytes))
+            
+            cursor.execute("SELECT total_bytes FROM generation_cache_size WHERE id = 1")
+            total_bytes = cursor.fetchone()[0]
+            while total_bytes > self.generation_cache_max_bytes:
+                cursor.execute('''
+                    SELECT rowid, size_bytes FROM generation_cache ORDER BY last_used ASC LIMIT 100
+                ''')
+                victims = []
+                for rowid, size in cursor.fetchall():
+                    if total_bytes <= self.generation_cache_max_bytes:
+                        break
+                    victims.append((rowid,))
+                    total_bytes -= size
+                if not victims:
+                    break
+                cursor.executemany("DELETE FROM generation_cache WHERE rowid = ?", victims)
+            
+            conn.commit()
+    
+    def invalidate_generation_cache(self, model_id, keep_version=None):
+        """Drop cached answers for a model, except those from ``keep_version``"""
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                DELETE FROM generation_cache WHERE model_id = ? AND model_version IS NOT ?
+            ''', (model_id, keep_version))
+            deleted = cursor.rowcount
+            
+            conn.commit()
+            return deleted
+    
+    def save_conversation(self, session_id, question, answer, intent, language, user_email=None, rating=None,
+                          intent_source=None):
+        """Save conversation to database (queued when write-behind is on)"""
+        # Stamped now, in CURRENT_TIMESTAMP's format, so a queued row keeps
+        # the time it was asked rather than the time it was flushed
+        timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        self._write(_INSERT_CONVERSATION, (session_id, question, answer, intent, language, user_email, timestamp, rating,
+                                          intent_source))
+    
+    def rate_conversation(self, session_id, question, rating):
+        """Record a rating for the session's latest answer to ``question``"""
+        # Queued behind the insert it refers to when write-behind is on
+        self._write(_RATE_CONVERSATION, (rating, session_id, question))
+    
+    def _write(self, statement, params):
+        if self.write_behind:
+            self._pending.put((time.monotonic(), statement, params))
+            return
+        with self._connection() as conn:
+            conn.execute(statement, params)
+            conn.commit()
+    
+    def flush(self):
+        """Block until every conversation queued so far is written"""
+        if self._writer is not None:
+            # Ends the writer's current wait instead of sitting out the interval
+            self._pending.put(_FLUSH)
+            self._pending.join()
+    
+    def write_stats(self):
+        """Write-behind counters; ``lag_ms`` is the age of the oldest unwritten write"""
+        pending = self._pending.qsize() if self._writer is not None else 0
+        lag_ms = 0.0
+        if pending:
+            with self._pending.mutex:
+                oldest = next((item[0] for item in self._pending.queue if item is not _STOP and item is not _FLUSH), None)
+            if oldest is not None:
+                lag_ms = (time.monotonic() - oldest) * 1000
+        return {
+            'pending': pending,
+            'lag_ms': lag_ms,
+            'last_flush_lag_ms': self.last_flush_lag * 1000,
+            'rows_written': self.rows_written,
+            'rows_dropped': self.rows_dropped,
+            'flushes': self.flushes,
+        }
+    
+    def _write_loop(self):
+        while True:
+            item = self._pending.get()
+            taken = 1
+            stop = item is _STOP
+            batch = [] if item in (_STOP, _FLUSH) else [item]
+            
+            deadline = time.monotonic() + self.flush_interval
+            while item is not _FLUSH and not stop and len(batch) < self.flush_rows:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._pending.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                taken += 1
+                if item is _STOP:
+                    stop = True
+                elif item is not _FLUSH:
+                    batch.append(item)
+            
+            if stop:
+                # Rows queued behind the stop marker are still written
+                while True:
+                    try:
+                        item = self._pending.get_nowait()
+                    except queue.Empty:
+                        break
+                    taken += 1
+                    if item not in (_STOP, _FLUSH):
+                        batch.append(item)
+            
+            if batch:
+                self._write_batch(batch)
+            for _ in range(taken):
+                self._pending.task_done()
+            if stop:
+                return
+    
+    def _write_batch(self, batch):
+        # One executemany per run of the same statement, in queue order
+        runs = []
+        for _, statement, params in batch:
+            if runs and runs[-1][0] is statement:
+                runs[-1][1].append(params)
+            else:
+                runs.append((statement, [params]))
+        for attempt in range(WRITE_RETRIES):
+            try:
+                with self._connection() as conn, conn:
+                    for statement, rows in runs:
+                        conn.executemany(statement, rows)
+            except sqlite3.Error:
+                time.sleep(0.05 * (attempt + 1))
+                continue
+            self.rows_written += len(batch)
+            self.flushes += 1
+            self.last_flush_lag = time.monotonic() - batch[0][0]
+            return
+        self.rows_dropped += len(batch)
+    
+    def get_labeled_conversations(self, limit=None):
+        """(question, intent) pairs for training the intent model, newest first.
         
-        conn.commit()
-        conn.close()
+        Only labels the model did not produce itself: intents of matched FAQ
+        entries, plus keyword-rule intents of highly rated answers. Rows
+        labeled by the model (or logged without a source) would only teach
+        it its own predictions.
+        """
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            
+            query = '''
+                SELECT question, intent FROM conversations
+                WHERE question IS NOT NULL AND question != '' AND intent IS NOT NULL
+                  AND (intent_source = ? OR (intent_source = ? AND rating >= ?))
+                ORDER BY id DESC
+            '''
+            params = (INTENT_SOURCE_ENTRY, INTENT_SOURCE_KEYWORD, TRAINING_MIN_RATING)
+            if limit is not None:
+                query += ' LIMIT ?'
+                cursor.execute(query, params + (limit,))
+            else:
+                cursor.execute(query, params)
+            rows = cursor.fetchall()
+            
+            return rows
     
-    def save_conversation(self, session_id, question, answer, intent, language, user_email=None):
-        """Save conversation to database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def get_analytics_summary(self, days=30):
+        """Dashboard aggregates as plain values and column lists, cached briefly.
         
-        cursor.execute('''
-            INSERT INTO conversations (session_id, question, answer, intent, language, user_email)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (session_id, question, answer, intent, language, user_email))
+        ``intent_data``, ``language_data`` and ``daily_data`` are dicts of
+        equal-length lists (daily rows newest first), which plotly accepts
+        as is and ``pandas.DataFrame`` converts directly.
+        """
+        key = ('summary', days)
+        summary = self._analytics_cache.get(key)
+        if summary is not None:
+            return summary
         
-        conn.commit()
-        conn.close()
+        # Viewers that miss together wait for one query instead of each running it
+        with self._analytics_lock:
+            summary = self._analytics_cache.get(key)
+            if summary is None:
+                summary = self._query_analytics_summary(days)
+                self._analytics_cache.put(key, summary)
+        return summary
+    
+    def _query_analytics_summary(self, days):
+        summary = {
+            'intent_data': {'intent': [], 'count': []},
+            'language_data': {'language': [], 'count': []},
+            'daily_data': {'date': [], 'count': [], 'unique_users': [], 'avg_session_length': [],
+                           'rating_sum': [], 'rating_count': []},
+        }
+        with self._connection() as conn:
+            rows = conn.execute(_ANALYTICS_SUMMARY, (days,)).fetchall()
+        for kind, name, count, rating_sum, rating_count, users, session_length in rows:
+            if kind == 'total':
+                summary.update(total_conversations=count, unique_users=users,
+                               rating_sum=rating_sum, rating_count=rating_count)
+            elif kind == 'day':
+                daily = summary['daily_data']
+                daily['date'].append(name)
+                daily['count'].append(count)
+                daily['unique_users'].append(users)
+                daily['avg_session_length'].append(session_length)
+                daily['rating_sum'].append(rating_sum)
+                daily['rating_count'].append(rating_count)
+            else:
+                columns = summary[f'{kind}_data']
+                columns[kind].append(name)
+                columns['count'].append(count)
+        return summary
     
     def get_analytics(self):
-        """Get analytics data"""
-        conn = sqlite3.connect(self.db_path)
-        
-        # Total conversations
-        total_conversations = pd.read_sql_query(
-            "SELECT COUNT(*) as count FROM conversations", conn
-        ).iloc[0]['count']
-        
-        # Questions by intent
-        intent_data = pd.read_sql_query(
-            "SELECT intent, COUNT(*) as count FROM conversations GROUP BY intent", conn
-        )
-        
-        # Questions by language
-        language_data = pd.read_sql_query(
-            "SELECT language, COUNT(*) as count FROM conversations GROUP BY language", conn
-        )
-        
-        # Daily activity
-        daily_data = pd.read_sql_query(
-            "SELECT DATE(timestamp) as date, COUNT(*) as count FROM conversations GROUP BY DATE(timestamp) ORDER BY date DESC LIMIT 30", conn
-        )
-        
-        conn.close()
+        """Get analytics data as DataFrames (see get_analytics_summary for the pandas-free version)"""
+        import pandas as pd
         
+        summary = self.get_analytics_summary()
+        daily = summary['daily_data']
         return {
-            'total_conversations': total_conversations,
-            'intent_data': intent_data,
-            'language_data': language_data,
-            'daily_data': daily_data
+            'total_conversations': summary['total_conversations'],
+            'intent_data': pd.DataFrame(summary['intent_data']),
+            'language_data': pd.DataFrame(summary['language_data']),
+            'daily_data': pd.DataFrame({'date': daily['date'], 'count': daily['count']})
         }
\ No newline at end of file
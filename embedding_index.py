@@ -0,0 +1,174 @@
+import os
+import json
+import hashlib
+import argparse
+from typing import List, Dict, Tuple, Optional
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+DEFAULT_PREFIX = "faq_embeddings"
+
+# Below this many entries a brute-force dot product beats probing clusters
+IVF_MIN_ENTRIES = 4096
+DEFAULT_NPROBE = 8
+
+# Cosine similarity a paraphrase needs before its FAQ answer is used
+SEMANTIC_MIN_SCORE = 0.6
+
+
+def faq_fingerprint(faq_data: List[Dict]) -> str:
+    """Hash of the FAQ prompts in order; embeddings are only valid for this exact list"""
+    prompts = json.dumps([item['prompt'] for item in faq_data], ensure_ascii=False)
+    return hashlib.sha1(prompts.encode('utf-8')).hexdigest()
+
+
+class Embedder:
+    """Mean-pooled sentence embeddings from a small local transformers model (CPU)"""
+
+    def __init__(self, model_name: str = DEFAULT_MODEL, local_files_only: bool = True):
+        import torch
+        from transformers import AutoTokenizer, AutoModel
+
+        self.model_name = model_name
+        self._torch = torch
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name, local_files_only=local_files_only)
+        self.model = AutoModel.from_pretrained(model_name, local_files_only=local_files_only)
+        self.model.eval()
+
+    def encode(self, texts: List[str], batch_size: int = 64) -> 'np.ndarray':
+        """Return L2-normalized float32 embeddings, one row per text"""
+        torch = self._torch
+        batches = []
+        with torch.inference_mode():
+            for start in range(0, len(texts), batch_size):
+                batch = self.tokenizer(
+                    texts[start:start + batch_size], padding=True, truncation=True,
+                    max_length=128, return_tensors='pt'
+                )
+                hidden = self.model(**batch).last_hidden_state
+                mask = batch['attention_mask'].unsqueeze(-1).type_as(hidden)
+                pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+                batches.append(torch.nn.functional.normalize(pooled, dim=1).numpy())
+
+        if not batches:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.concatenate(batches).astype(np.float32)
+
+
+def _spherical_kmeans(vectors: 'np.ndarray', nlist: int, iterations: int = 10, seed: int = 0) -> Tuple['np.ndarray', 'np.ndarray']:
+    """Cluster unit vectors by cosine similarity; returns (centroids, assignments)"""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = (vectors @ centroids.T).argmax(axis=1)
+        for c in range(nlist):
+            members = vectors[assignments == c]
+            if len(members):
+                centroid = members.sum(axis=0)
+                centroids[c] = centroid / max(np.linalg.norm(centroid), 1e-9)
+    return centroids, (vectors @ centroids.T).argmax(axis=1)
+
+
+def build_index(faq_path: str = 'college_faq.json', prefix: str = DEFAULT_PREFIX,
+                model_name: str = DEFAULT_MODEL, nlist: Optional[int] = None) -> Dict:
+    """Embed every FAQ prompt and write the .npy files the app memory-maps"""
+    with open(faq_path, 'r', encoding='utf-8') as f:
+        faq_data = json.load(f)
+
+    embedder = Embedder(model_name)
+    embeddings = embedder.encode([item['prompt'] for item in faq_data])
+    np.save(f"{prefix}.npy", embeddings)
+
+    meta = {
+        'model': model_name,
+        'count': int(embeddings.shape[0]),
+        'dim': int(embeddings.shape[1]) if embeddings.size else 0,
+        'faq_fingerprint': faq_fingerprint(faq_data),
+        'nlist': 0,
+    }
+
+    if nlist is None and len(embeddings) >= IVF_MIN_ENTRIES:
+        nlist = int(np.sqrt(len(embeddings)))
+    if nlist:
+        centroids, assignments = _spherical_kmeans(embeddings, nlist)
+        # Entries grouped by cluster: members of cluster c are order[offsets[c]:offsets[c + 1]]
+        order = np.argsort(assignments, kind='stable').astype(np.int32)
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=nlist))]).astype(np.int64)
+        np.save(f"{prefix}.centroids.npy", centroids.astype(np.float32))
+        np.save(f"{prefix}.order.npy", order)
+        np.save(f"{prefix}.offsets.npy", offsets)
+        meta['nlist'] = nlist
+
+    with open(f"{prefix}.meta.json", 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+class SemanticIndex:
+    """Memory-mapped FAQ embedding matrix with optional IVF coarse clustering"""
+
+    def __init__(self, prefix: str = DEFAULT_PREFIX):
+        with open(f"{prefix}.meta.json", 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+
+        # mmap keeps the matrix in the page cache, shared by every worker process
+        self.embeddings = np.load(f"{prefix}.npy", mmap_mode='r')
+        self.centroids = None
+        if self.meta.get('nlist'):
+            self.centroids = np.load(f"{prefix}.centroids.npy")
+            self.order = np.load(f"{prefix}.order.npy", mmap_mode='r')
+            self.offsets = np.load(f"{prefix}.offsets.npy")
+
+    @classmethod
+    def load(cls, faq_data: List[Dict], prefix: str = DEFAULT_PREFIX) -> Optional['SemanticIndex']:
+        """Load the index if it exists and was built from this exact FAQ"""
+        if not NUMPY_AVAILABLE or not os.path.exists(f"{prefix}.meta.json"):
+            return None
+        index = cls(prefix)
+        if index.meta.get('faq_fingerprint') != faq_fingerprint(faq_data):
+            return None
+        return index
+
+    @property
+    def model_name(self) -> str:
+        return self.meta['model']
+
+    def search(self, query: 'np.ndarray', k: int = 1, nprobe: int = DEFAULT_NPROBE) -> List[Tuple[int, float]]:
+        """Return up to k (entry id, cosine similarity) pairs, best first"""
+        if self.centroids is None:
+            candidates = None
+            scores = self.embeddings @ query
+        else:
+            nearest = np.argsort(-(self.centroids @ query))[:nprobe]
+            candidates = np.concatenate([self.order[self.offsets[c]:self.offsets[c + 1]] for c in nearest])
+            scores = self.embeddings[candidates] @ query
+
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        ids = top if candidates is None else candidates[top]
+        return [(int(i), float(s)) for i, s in zip(ids, scores[top])]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the FAQ embedding index")
+    parser.add_argument('--faq', default='college_faq.json')
+    parser.add_argument('--prefix', default=DEFAULT_PREFIX, help="Output path prefix for the .npy files")
+    parser.add_argument('--model', default=DEFAULT_MODEL, help="Local sentence embedding model")
+    parser.add_argument('--nlist', type=int, default=None,
+                        help=f"IVF clusters (default: sqrt(N) once the FAQ has {IVF_MIN_ENTRIES}+ entries)")
+    args = parser.parse_args()
+
+    meta = build_index(args.faq, args.prefix, args.model, args.nlist)
+    print(f"Embedded {meta['count']} prompts ({meta['dim']} dims, {meta['nlist']} clusters) -> {args.prefix}.npy")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+import os
+import sys
+import json
+import struct
+import hashlib
+import argparse
+from typing import Dict, Optional
+
+from faq_index import FAQIndex, BOOST_TERMS
+from intent_classifier import INTENT_KEYWORDS
+
+MAGIC = b'FAQSNAP\x00'
+# Bump when FAQIndex's tokenization or table layout changes
+FORMAT_VERSION = 3
+# magic, format version, sha1 of the source JSON, sha1 of the keyword tables (hex)
+_HEADER = struct.Struct('<8sH40s40s')
+
+
+def _tables_hash() -> str:
+    """Hash of the keyword tables baked into the index (intents, boost postings)"""
+    tables = json.dumps([INTENT_KEYWORDS, BOOST_TERMS], sort_keys=True)
+    return hashlib.sha1(tables.encode('utf-8')).hexdigest()
+
+
+def snapshot_path_for(faq_path: str) -> str:
+    """Default snapshot location next to the JSON file"""
+    return os.path.splitext(faq_path)[0] + '.snapshot'
+
+
+def compile_faq(faq_path: str = 'college_faq.json', out_path: Optional[str] = None) -> str:
+    """Write a snapshot of the FAQ entries and their prebuilt index tables.
+
+    The payload is JSON, so a tampered snapshot can at worst give wrong
+    answers; it is never executed.
+    """
+    out_path = out_path or snapshot_path_for(faq_path)
+    with open(faq_path, 'rb') as f:
+        raw = f.read()
+    faq_data = json.loads(raw.decode('utf-8'))
+
+    index = FAQIndex(faq_data)
+    payload = json.dumps({'faq_data': faq_data, 'index': index.to_state()},
+                         ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, hashlib.sha1(raw).hexdigest().encode('ascii'),
+                          _tables_hash().encode('ascii'))
+
+    # Write then rename so a worker never reads a half-written snapshot
+    tmp_path = out_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(header + payload)
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+def load_snapshot(snapshot_path: str, source_hash: str) -> Optional[Dict]:
+    """Load a snapshot in one read if it matches the format, the source JSON and the keyword tables"""
+    try:
+        with open(snapshot_path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    if len(data) < _HEADER.size:
+        return None
+    magic, version, compiled_hash, tables_hash = _HEADER.unpack_from(data)
+    if (magic != MAGIC or version != FORMAT_VERSION or compiled_hash.decode('ascii') != source_hash
+            or tables_hash.decode('ascii') != _tables_hash()):
+        return None
+
+    try:
+        payload = json.loads(data[_HEADER.size:].decode('utf-8'))
+        faq_data = payload['faq_data']
+        return {'faq_data': faq_data, 'index': FAQIndex.from_state(faq_data, payload['index'])}
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile college_faq.json into a prebuilt snapshot for fast startup")
+    parser.add_argument('--faq', default='college_faq.json')
+    parser.add_argument('--out', default=None, help="Snapshot path (default: <faq>.snapshot)")
+    args = parser.parse_args()
+
+    out_path = compile_faq(args.faq, args.out)
+    print(f"Compiled {args.faq} -> {out_path} ({os.path.getsize(out_path)} bytes)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
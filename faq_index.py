@@ -0,0 +1,399 @@
+import re
+import unicodedata
+import copy
+import heapq
+from typing import List, Dict, Tuple, Optional, NamedTuple
+from collections import defaultdict
+
+from intent_classifier import classify_intent
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Terms that get an extra score boost when they appear in both the question
+# and the FAQ prompt (substring match, same as the original scoring).
+BOOST_TERMS = {
+    'scholarship': 0.5,
+    'fee': 0.3,
+}
+
+MIN_MATCH_SCORE = 0.2
+
+SCHOLARSHIP_FALLBACK = "Scholarships are available for meritorious and economically weaker students. Please check the scholarship section on our website for detailed information and application procedures."
+GENERAL_FALLBACK = "I'm sorry, I don't have specific information about that. Please contact our admissions office at admissions@college.edu or call +91-1234567890 for detailed assistance."
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_TRAILING_PUNCT = '?!.,;:'
+
+
+def entry_intent(item: Dict) -> str:
+    """Intent of a FAQ entry: its own ``intent`` field, else the keyword intent of its prompt"""
+    return item.get('intent') or classify_intent(item['prompt'])
+
+
+def normalize_prompt(text: str) -> str:
+    """Normalize a question for exact lookup (casefold, whitespace, trailing punctuation)"""
+    text = unicodedata.normalize('NFKC', text).casefold()
+    text = _WHITESPACE_RE.sub(' ', text).strip()
+    return text.rstrip(_TRAILING_PUNCT + ' ')
+
+
+class FAQChanges(NamedTuple):
+    """Entries that differ between two FAQ versions (ids refer to the new list)"""
+    changed_ids: List[int]
+    added_ids: List[int]
+    removed_count: int
+    # Normalized prompts of every old or new entry that was touched
+    affected_prompts: set
+    # False when only responses changed, so rankings are unaffected
+    prompts_changed: bool
+
+    def __bool__(self):
+        return bool(self.changed_ids or self.added_ids or self.removed_count)
+
+
+class FAQIndex:
+    """Inverted token index over the FAQ prompts.
+
+    Built once per FAQ load so a question is only scored against the
+    entries that share at least one token (or boost term) with it. The
+    intent of every entry is precomputed too, so a matched question needs
+    no separate intent pass.
+    """
+
+    def __init__(self, faq_data: List[Dict]):
+        self.faq_data = faq_data
+        self.prompts_lower = []
+        self.prompt_tokens = []
+        self.normalized_prompts = []
+        self.postings = defaultdict(list)
+        self.boost_postings = {term: [] for term in BOOST_TERMS}
+        # Normalized prompt -> entry id
+        self.exact = {}
+        self.intents = [entry_intent(item) for item in faq_data]
+        self._csr = None
+
+        for doc_id, item in enumerate(faq_data):
+            self.prompts_lower.append(None)
+            self.prompt_tokens.append(None)
+            self.normalized_prompts.append(None)
+            self._add_doc(doc_id, item)
+            # First entry wins on duplicate prompts, same as a linear scan
+            self.exact.setdefault(self.normalized_prompts[doc_id], doc_id)
+
+    def _add_doc(self, doc_id: int, item: Dict):
+        prompt_lower = item['prompt'].lower()
+        tokens = set(prompt_lower.split())
+        self.prompts_lower[doc_id] = prompt_lower
+        self.prompt_tokens[doc_id] = tokens
+        self.normalized_prompts[doc_id] = normalize_prompt(item['prompt'])
+
+        for token in tokens:
+            self.postings[token].append(doc_id)
+        for term in BOOST_TERMS:
+            if term in prompt_lower:
+                self.boost_postings[term].append(doc_id)
+
+    def _remove_doc(self, doc_id: int, prompt_lower: str, tokens: set):
+        for token in tokens:
+            postings = self.postings[token]
+            postings.remove(doc_id)
+            if not postings:
+                del self.postings[token]
+        for term, postings in self.boost_postings.items():
+            if term in prompt_lower:
+                postings.remove(doc_id)
+
+    def updated(self, new_faq_data: List[Dict]) -> Tuple['FAQIndex', FAQChanges]:
+        """Return a new index for ``new_faq_data``, re-indexing only the entries that changed.
+
+        Entries are compared by position; the current index is left untouched
+        (posting lists are copied only where they change), so readers holding
+        it keep a consistent view while the new one is swapped in.
+        """
+        old_data = self.faq_data
+        common = min(len(old_data), len(new_faq_data))
+        changed_ids = [i for i in range(common) if old_data[i] != new_faq_data[i]]
+        added_ids = list(range(common, len(new_faq_data)))
+        removed_ids = list(range(common, len(old_data)))
+        reindexed = [i for i in changed_ids if old_data[i]['prompt'] != new_faq_data[i]['prompt']]
+
+        index = copy.copy(self)
+        index.faq_data = new_faq_data
+        index.prompts_lower = self.prompts_lower[:common]
+        index.prompt_tokens = self.prompt_tokens[:common]
+        index.normalized_prompts = self.normalized_prompts[:common]
+        index.intents = self.intents[:common]
+        index._csr = None
+
+        affected_prompts = {self.normalized_prompts[i] for i in changed_ids + removed_ids}
+
+        if reindexed or added_ids or removed_ids:
+            # Copy-on-write: only the posting lists we touch are duplicated
+            touched = set()
+            for doc_id in reindexed + removed_ids:
+                touched.update(self.prompt_tokens[doc_id])
+            for item in (new_faq_data[i] for i in reindexed + added_ids):
+                touched.update(item['prompt'].lower().split())
+            index.postings = defaultdict(list, self.postings)
+            for token in touched:
+                index.postings[token] = list(self.postings.get(token, ()))
+            index.boost_postings = {term: list(ids) for term, ids in self.boost_postings.items()}
+
+            for doc_id in reindexed + removed_ids:
+                index._remove_doc(doc_id, self.prompts_lower[doc_id], self.prompt_tokens[doc_id])
+            for doc_id in reindexed:
+                index._add_doc(doc_id, new_faq_data[doc_id])
+            for doc_id in added_ids:
+                index.prompts_lower.append(None)
+                index.prompt_tokens.append(None)
+                index.normalized_prompts.append(None)
+                index._add_doc(doc_id, new_faq_data[doc_id])
+
+        index.intents.extend(None for _ in added_ids)
+        for doc_id in changed_ids + added_ids:
+            affected_prompts.add(index.normalized_prompts[doc_id])
+            index.intents[doc_id] = entry_intent(new_faq_data[doc_id])
+
+        # Re-resolve exact-match keys that may now point at another entry
+        index.exact = dict(self.exact)
+        for key in affected_prompts:
+            index.exact.pop(key, None)
+        for doc_id, key in enumerate(index.normalized_prompts):
+            if key in affected_prompts and key not in index.exact:
+                index.exact[key] = doc_id
+
+        changes = FAQChanges(changed_ids, added_ids, len(removed_ids), affected_prompts,
+                             bool(reindexed or added_ids or removed_ids))
+        return index, changes
+
+    def to_state(self) -> Dict:
+        """The built tables as plain lists and dicts (JSON-serializable), see ``from_state``"""
+        return {
+            'normalized_prompts': self.normalized_prompts,
+            'postings': dict(self.postings),
+            'boost_postings': self.boost_postings,
+            'exact': self.exact,
+            'intents': self.intents,
+        }
+
+    @classmethod
+    def from_state(cls, faq_data: List[Dict], state: Dict) -> 'FAQIndex':
+        """Rebuild an index from ``to_state`` output without re-tokenizing or classifying"""
+        index = cls.__new__(cls)
+        index.faq_data = faq_data
+        index.prompts_lower = [item['prompt'].lower() for item in faq_data]
+        index.prompt_tokens = [set(prompt.split()) for prompt in index.prompts_lower]
+        index.normalized_prompts = state['normalized_prompts']
+        index.postings = defaultdict(list, state['postings'])
+        index.boost_postings = state['boost_postings']
+        index.exact = state['exact']
+        index.intents = state['intents']
+        index._csr = None
+        return index
+
+    def __len__(self):
+        return len(self.faq_data)
+
+    def exact_match(self, question: str) -> Optional[Dict]:
+        """Look up a FAQ entry whose normalized prompt equals the question"""
+        doc_id = self.exact_match_id(question)
+        return None if doc_id is None else self.faq_data[doc_id]
+
+    def exact_match_id(self, question: str) -> Optional[int]:
+        return self.exact.get(normalize_prompt(question))
+
+    def candidates(self, question_lower: str, question_words: set) -> set:
+        """Return ids of FAQ entries that can score above zero"""
+        doc_ids = set()
+        for token in question_words:
+            doc_ids.update(self.postings.get(token, ()))
+        for term, postings in self.boost_postings.items():
+            if term in question_lower:
+                doc_ids.update(postings)
+        return doc_ids
+
+    def score_components(self, question_lower: str, question_words: set, doc_id: int) -> Tuple[float, float, float]:
+        """Return (base similarity, keyword boost, total score) for one FAQ entry"""
+        prompt_lower = self.prompts_lower[doc_id]
+        prompt_words = self.prompt_tokens[doc_id]
+        base_score = 0
+
+        common_words = question_words.intersection(prompt_words)
+        if common_words:
+            base_score = len(common_words) / len(question_words.union(prompt_words))
+
+        # Boosts are added one at a time so the total matches the batch path
+        score = base_score
+        keyword_boost = 0
+        for term, boost in BOOST_TERMS.items():
+            if term in question_lower and term in prompt_lower:
+                score += boost
+                keyword_boost += boost
+
+        return base_score, keyword_boost, score
+
+    def score(self, question_lower: str, question_words: set, doc_id: int) -> float:
+        """Jaccard word overlap plus key-term boosts for one FAQ entry"""
+        return self.score_components(question_lower, question_words, doc_id)[2]
+
+    def best_match(self, question: str, min_score: float = MIN_MATCH_SCORE) -> Tuple[Optional[Dict], float]:
+        """Find the highest scoring FAQ entry for a question"""
+        doc_id, score = self.best_match_id(question, min_score)
+        return (None if doc_id is None else self.faq_data[doc_id]), score
+
+    def best_match_id(self, question: str, min_score: float = MIN_MATCH_SCORE) -> Tuple[Optional[int], float]:
+        """Id and score of the highest scoring FAQ entry (None, 0 when nothing clears ``min_score``)"""
+        question_lower = question.lower().strip()
+        question_words = set(question_lower.split())
+
+        best_id = None
+        max_score = 0
+        # Iterate in FAQ order so ties resolve the same way as a full scan
+        for doc_id in sorted(self.candidates(question_lower, question_words)):
+            score = self.score(question_lower, question_words, doc_id)
+            if score > max_score and score > min_score:
+                max_score = score
+                best_id = doc_id
+
+        return best_id, max_score
+
+    def top_k(self, question: str, k: int = 5, min_score: float = 0.0) -> List[Dict]:
+        """Return the k best scoring FAQ entries with per-component scores.
+
+        Uses heap-based partial selection over the index candidates, so the
+        full candidate list is never sorted.
+        """
+        question_lower = question.lower().strip()
+        question_words = set(question_lower.split())
+
+        scored = []
+        for doc_id in self.candidates(question_lower, question_words):
+            base_score, keyword_boost, score = self.score_components(question_lower, question_words, doc_id)
+            if score > min_score:
+                scored.append((score, -doc_id, base_score, keyword_boost))
+
+        return [
+            {
+                'item': self.faq_data[-neg_doc_id],
+                'score': score,
+                'base_score': base_score,
+                'context_boost': 0.0,
+                'keyword_boost': keyword_boost,
+            }
+            for score, neg_doc_id, base_score, keyword_boost in heapq.nlargest(k, scored)
+        ]
+
+    def best_match_many(self, questions: List[str], min_score: float = MIN_MATCH_SCORE) -> List[Tuple[Optional[Dict], float]]:
+        """``best_match`` for a batch of questions (see ``best_match_id_many``)"""
+        return [(None if doc_id is None else self.faq_data[doc_id], score)
+                for doc_id, score in self.best_match_id_many(questions, min_score)]
+
+    def best_match_id_many(self, questions: List[str], min_score: float = MIN_MATCH_SCORE) -> List[Tuple[Optional[int], float]]:
+        """Score a batch of questions against the FAQ in one sparse matrix pass.
+
+        Token overlaps for every (question, entry) pair come from joining the
+        batch's token ids with the posting lists, so the work is proportional
+        to the matching postings rather than batch size x FAQ size.
+        """
+        if not NUMPY_AVAILABLE or not self.faq_data:
+            return [self.best_match_id(q, min_score) for q in questions]
+
+        vocab, indptr, term_docs, doc_lengths = self._postings_csr()
+        num_docs = len(self.faq_data)
+
+        questions_lower = [q.lower().strip() for q in questions]
+        query_ids = []
+        term_ids = []
+        query_lengths = np.zeros(len(questions), dtype=np.float64)
+        for i, question_lower in enumerate(questions_lower):
+            words = set(question_lower.split())
+            query_lengths[i] = len(words)
+            for word in words:
+                term_id = vocab.get(word)
+                if term_id is not None:
+                    query_ids.append(i)
+                    term_ids.append(term_id)
+
+        keys = [np.zeros(0, dtype=np.int64)]
+        values = [np.zeros(0, dtype=np.float64)]
+
+        # Jaccard over token sets: |q & d| / (|q| + |d| - |q & d|)
+        if term_ids:
+            query_ids = np.array(query_ids, dtype=np.int64)
+            term_ids = np.array(term_ids, dtype=np.int64)
+            starts = indptr[term_ids]
+            counts = indptr[term_ids + 1] - starts
+            offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            docs = term_docs[np.repeat(starts, counts) + offsets]
+            pair_keys, overlap = np.unique(np.repeat(query_ids, counts) * num_docs + docs, return_counts=True)
+            union = query_lengths[pair_keys // num_docs] + doc_lengths[pair_keys % num_docs] - overlap
+            keys.append(pair_keys)
+            values.append(overlap / union)
+
+        # Key-term boosts apply even without a shared token
+        for term, boost in BOOST_TERMS.items():
+            boost_docs = np.array(self.boost_postings[term], dtype=np.int64)
+            boosted = np.array([i for i, q in enumerate(questions_lower) if term in q], dtype=np.int64)
+            if len(boost_docs) and len(boosted):
+                keys.append((boosted[:, None] * num_docs + boost_docs[None, :]).ravel())
+                values.append(np.full(len(boosted) * len(boost_docs), boost))
+
+        all_keys, inverse = np.unique(np.concatenate(keys), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(values))
+
+        results = [(None, 0)] * len(questions)
+        keep = scores > min_score
+        all_keys, scores = all_keys[keep], scores[keep]
+        if len(all_keys):
+            query_idx, doc_idx = all_keys // num_docs, all_keys % num_docs
+            # Best score per question, lowest entry id on ties (FAQ order)
+            order = np.lexsort((doc_idx, -scores, query_idx))
+            first = order[np.unique(query_idx[order], return_index=True)[1]]
+            for i, doc_id, score in zip(query_idx[first], doc_idx[first], scores[first]):
+                results[int(i)] = (int(doc_id), float(score))
+        return results
+
+    def _postings_csr(self):
+        """Posting lists as flat arrays for batch scoring (built on first use)"""
+        if self._csr is None:
+            vocab = {}
+            indptr = [0]
+            term_docs = []
+            for term_id, (token, doc_ids) in enumerate(self.postings.items()):
+                vocab[token] = term_id
+                term_docs.extend(doc_ids)
+                indptr.append(len(term_docs))
+            doc_lengths = np.array([len(t) for t in self.prompt_tokens], dtype=np.float64)
+            self._csr = (vocab, np.array(indptr, dtype=np.int64), np.array(term_docs, dtype=np.int64), doc_lengths)
+        return self._csr
+
+    def answer(self, question: str) -> Tuple[str, float]:
+        """Answer a question with exact match, keyword scoring, then fallbacks"""
+        answer, confidence, _ = self.retrieve(question)
+        return answer, confidence
+
+    def retrieve(self, question: str) -> Tuple[str, float, Optional[str]]:
+        """Answer, confidence and the matched entry's intent (None when a fallback answered)"""
+        doc_id = self.exact_match_id(question)
+        score = 1.0
+        if doc_id is None:
+            doc_id, score = self.best_match_id(question)
+        if doc_id is None:
+            answer, confidence = self.answer_from_match(question, None, 0)
+            return answer, confidence, None
+        return self.faq_data[doc_id]['response'], score, self.intents[doc_id]
+
+    def answer_from_match(self, question: str, match: Optional[Dict], score: float) -> Tuple[str, float]:
+        """Turn a scored match into an answer, falling back when nothing matched"""
+        if match:
+            return match['response'], score
+
+        # Specific fallback for scholarship questions
+        if 'scholarship' in question.lower():
+            return SCHOLARSHIP_FALLBACK, 0.7
+
+        return GENERAL_FALLBACK, 0.3
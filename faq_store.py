@@ -0,0 +1,122 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import List, Dict, Callable, NamedTuple, Optional
+
+from faq_index import FAQIndex, FAQChanges
+from faq_compile import load_snapshot, snapshot_path_for
+
+
+class FAQSnapshot(NamedTuple):
+    """One consistent version of the FAQ and its retrieval structures"""
+    faq_data: List[Dict]
+    index: FAQIndex
+    version: str
+
+
+def _content_hash(raw: bytes) -> str:
+    return hashlib.sha1(raw).hexdigest()
+
+
+class FAQStore:
+    """Holds the current FAQ snapshot and hot-reloads it when the file changes.
+
+    ``refresh()`` stats the file (at most every ``check_interval`` seconds);
+    when the mtime moves and the content hash differs, the new entries are
+    diffed against the current ones, the index is updated incrementally and
+    the new snapshot replaces the old one in a single reference swap.
+    Callers should read ``store.snapshot`` once per question.
+    """
+
+    def __init__(self, path: str = 'college_faq.json', check_interval: float = 2.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.error = None
+        self._listeners: List[Callable[[FAQSnapshot, FAQChanges], None]] = []
+        self._reload_lock = threading.Lock()
+        self._last_check = 0.0
+        self._mtime = None
+
+        # Cold start prefers the prebuilt snapshot from `python -m faq_compile`
+        faq_data, version, index = self._read(use_compiled=True)
+        self.snapshot = FAQSnapshot(faq_data, index or FAQIndex(faq_data), version)
+
+    def add_listener(self, callback: Callable[[FAQSnapshot, FAQChanges], None]):
+        """Call ``callback(new_snapshot, changes)`` after every reload"""
+        self._listeners.append(callback)
+
+    def refresh(self, force: bool = False) -> Optional[FAQChanges]:
+        """Reload the FAQ if the file changed; returns the changes, if any"""
+        now = time.monotonic()
+        if not force and now - self._last_check < self.check_interval:
+            return None
+
+        # Only one thread rebuilds; others keep serving the current snapshot
+        if not self._reload_lock.acquire(blocking=False):
+            return None
+        try:
+            self._last_check = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                return None
+            if mtime == self._mtime and not force:
+                return None
+
+            current = self.snapshot
+            faq_data, version, _ = self._read()
+            if version == current.version:
+                return None
+
+            index, changes = current.index.updated(faq_data)
+            snapshot = FAQSnapshot(faq_data, index, version)
+            self.snapshot = snapshot
+
+            for callback in self._listeners:
+                callback(snapshot, changes)
+            return changes
+        finally:
+            self._reload_lock.release()
+
+    def _load_compiled(self, version: str):
+        """Use the compiled snapshot when it is newer than the JSON and built from it"""
+        snapshot_path = snapshot_path_for(self.path)
+        try:
+            if os.stat(snapshot_path).st_mtime_ns < self._mtime:
+                return None
+        except (OSError, TypeError):
+            return None
+        return load_snapshot(snapshot_path, version)
+
+    def _read(self, use_compiled: bool = False):
+        """Load the file, returning (entries, content hash, prebuilt index or None).
+
+        Keeps the current data when the file is missing or invalid.
+        """
+        try:
+            self._mtime = os.stat(self.path).st_mtime_ns
+            with open(self.path, 'rb') as f:
+                raw = f.read()
+            version = _content_hash(raw)
+
+            if use_compiled:
+                compiled = self._load_compiled(version)
+                if compiled is not None:
+                    self.error = None
+                    return compiled['faq_data'], version, compiled['index']
+
+            faq_data = json.loads(raw.decode('utf-8'))
+            self.error = None
+            return faq_data, version, None
+        except FileNotFoundError:
+            self.error = f"{self.path} not found. Please ensure the file exists."
+        except ValueError as e:
+            # A half-saved edit should not take the chatbot down
+            self.error = f"Could not parse {self.path}: {e}"
+
+        current = getattr(self, 'snapshot', None)
+        if current is not None:
+            return current.faq_data, current.version, None
+        return [], '', None
@@ -0,0 +1,197 @@
+import time
+import queue
+import threading
+from bisect import bisect_left
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import List, Dict, Iterator, Optional, Tuple
+
+# Requests are grouped by input length so each generate call pads only to
+# the longest prompt in its own bucket (token counts)
+LENGTH_BUCKETS = (16, 32, 64, 128)
+
+PROMPT_TEMPLATE = "### Question: {question}"
+
+_STOP = object()
+
+
+class BatchedInferenceService:
+    """Micro-batches generation requests from all sessions onto one worker thread.
+
+    Callers get a ``Future`` from ``submit``. The worker waits for the first
+    request, then keeps collecting until ``max_batch_size`` requests are
+    pending or ``max_wait_ms`` has passed, splits them into length buckets
+    and runs one pipeline call per bucket.
+
+    With a ``cache`` (a ChatDatabase), answers are looked up before queueing
+    and stored after generation, keyed by question, model and parameters.
+
+    ``stream`` requests go through the same worker but run on their own,
+    since a token streamer follows a single sequence, so concurrent
+    streams are served one after another; prefer ``submit`` under load.
+    """
+
+    def __init__(self, qa_pipeline, max_batch_size: int = 8, max_wait_ms: float = 20,
+                 generate_kwargs: Optional[Dict] = None, cache=None,
+                 model_id: Optional[str] = None, model_version: Optional[str] = None):
+        self.pipeline = qa_pipeline
+        self.cache = cache
+        self.model_id = model_id or getattr(getattr(qa_pipeline, 'model', None), 'name_or_path', 'unknown')
+        self.model_version = model_version
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.generate_kwargs = generate_kwargs or {'max_new_tokens': 128}
+        self.tokenizer = getattr(qa_pipeline, 'tokenizer', None)
+
+        self._queue = queue.Queue()
+        self.batches_run = 0
+        self.requests_served = 0
+        self._worker = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, question: str) -> Future:
+        """Queue a question for generation; the future resolves to the answer text"""
+        future = Future()
+        cached = self._lookup(question)
+        if cached is not None:
+            future.set_result(cached)
+            return future
+        self._queue.put((question, future, None))
+        return future
+
+    def generate(self, question: str, timeout: Optional[float] = None) -> str:
+        """Blocking convenience wrapper around ``submit``"""
+        future = self.submit(question)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # Nobody will read the answer; the worker skips it if not yet started
+            future.cancel()
+            raise
+
+    def stream(self, question: str, timeout: Optional[float] = None) -> Iterator[str]:
+        """Yield the answer text piece by piece as the model generates it"""
+        cached = self._lookup(question)
+        if cached is not None:
+            yield cached
+            return
+
+        from transformers import TextIteratorStreamer
+        streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True, timeout=timeout)
+        future = Future()
+        self._queue.put((question, future, streamer))
+        try:
+            for text in streamer:
+                if text:
+                    yield text
+        finally:
+            # A reader that timed out or stopped early drops a request still queued
+            if not future.done():
+                future.cancel()
+        # Surface generation errors once the streamer has been closed
+        future.result(timeout=timeout)
+
+    def shutdown(self):
+        """Stop the worker after the requests already queued"""
+        self._queue.put(_STOP)
+        self._worker.join()
+
+    def _collect(self, first) -> Tuple[List, bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _token_length(self, prompt: str) -> int:
+        if self.tokenizer is not None:
+            return len(self.tokenizer(prompt, truncation=True)['input_ids'])
+        return len(prompt.split())
+
+    def _buckets(self, batch: List) -> List[List]:
+        buckets: Dict[int, List] = {}
+        for question, future, _ in batch:
+            prompt = PROMPT_TEMPLATE.format(question=question)
+            bucket = bisect_left(LENGTH_BUCKETS, self._token_length(prompt))
+            buckets.setdefault(bucket, []).append((question, prompt, future))
+        return [buckets[b] for b in sorted(buckets)]
+
+    def _lookup(self, question: str) -> Optional[str]:
+        if self.cache is None:
+            return None
+        try:
+            return self.cache.get_cached_generation(question, self.model_id, self.generate_kwargs, self.model_version)
+        except Exception:
+            return None
+
+    def _store(self, question: str, answer: str):
+        if self.cache is None:
+            return
+        try:
+            self.cache.cache_generation(question, self.model_id, answer, self.generate_kwargs, self.model_version)
+        except Exception:
+            # A locked or read-only cache must not fail the answer
+            pass
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch, stop = self._collect(first)
+
+            for question, future, streamer in batch:
+                if streamer is not None:
+                    self._run_streamed(question, future, streamer)
+            batch = [request for request in batch if request[2] is None]
+
+            for bucket in self._buckets(batch):
+                # Skip requests whose callers already gave up
+                bucket = [request for request in bucket if request[2].set_running_or_notify_cancel()]
+                if not bucket:
+                    continue
+                prompts = [prompt for _, prompt, _ in bucket]
+                try:
+                    outputs = self.pipeline(prompts, batch_size=len(prompts), **self.generate_kwargs)
+                except Exception as e:
+                    for _, _, future in bucket:
+                        future.set_exception(e)
+                    continue
+                for (question, _, future), output in zip(bucket, outputs):
+                    if isinstance(output, list):
+                        output = output[0]
+                    answer = output['generated_text']
+                    future.set_result(answer)
+                    self._store(question, answer)
+                self.batches_run += 1
+                self.requests_served += len(bucket)
+
+            if stop:
+                return
+
+    def _run_streamed(self, question: str, future: Future, streamer):
+        if not future.set_running_or_notify_cancel():
+            streamer.end()
+            return
+        try:
+            output = self.pipeline(PROMPT_TEMPLATE.format(question=question), streamer=streamer, **self.generate_kwargs)
+        except Exception as e:
+            # Unblock the reader before reporting the failure
+            streamer.end()
+            future.set_exception(e)
+            return
+        if isinstance(output, list):
+            output = output[0]
+        answer = output['generated_text']
+        future.set_result(answer)
+        self._store(question, answer)
+        self.batches_run += 1
+        self.requests_served += 1
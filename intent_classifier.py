@@ -1,15 +1,125 @@
 import re
+from collections import deque
+from typing import List, Dict, Tuple, Iterator
+
+# Intent -> keywords, in priority order (earlier intents win ties)
+INTENT_KEYWORDS = {
+    'fees': ['fee', 'cost', 'payment', 'money', 'scholarship'],
+    'dates': ['date', 'deadline', 'when', 'time', 'exam', 'result'],
+    'eligibility': ['eligibility', 'criteria', 'requirement', 'qualify'],
+    'courses': ['course', 'program', 'degree', 'branch', 'subject'],
+    'admission': ['admission', 'apply', 'process', 'form'],
+    'hostel': ['hostel', 'accommodation', 'room'],
+    'placement': ['placement', 'job', 'career', 'company']
+}
+
+# Conversation topics tracked by SmartResponseSystem
+TOPIC_KEYWORDS = {
+    'fees': ['fee', 'cost'],
+    'eligibility': ['eligibility', 'criteria'],
+    'dates': ['date', 'deadline']
+}
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton: finds every keyword occurrence in one pass over the text"""
+
+    def __init__(self, keywords: List[str]):
+        self.keywords = keywords
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+
+        for keyword_id, keyword in enumerate(keywords):
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(keyword_id)
+
+        # Breadth-first failure links; each state also inherits the outputs
+        # of its failure state so suffix keywords are reported
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Yield (end position, keyword id) for every occurrence"""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for keyword_id in output[state]:
+                yield position, keyword_id
+
+
+class IntentClassifier:
+    """Keyword intent classifier built on a single compiled automaton"""
+
+    def __init__(self, intent_keywords: Dict[str, List[str]] = INTENT_KEYWORDS,
+                 keyword_weights: Dict[str, float] = None):
+        self.intents = list(intent_keywords)
+        keyword_weights = keyword_weights or {}
+
+        keywords = []
+        self._keyword_intents = []
+        self._keyword_weights = []
+        for intent_id, (intent, words) in enumerate(intent_keywords.items()):
+            for word in words:
+                keywords.append(word)
+                self._keyword_intents.append(intent_id)
+                self._keyword_weights.append(keyword_weights.get(word, 1.0))
+        self.automaton = KeywordAutomaton(keywords)
+
+    def scores(self, text: str) -> List[Tuple[str, float]]:
+        """All matched intents with weights, best first (declaration order on ties).
+
+        Each distinct keyword counts once, however often it appears.
+        """
+        seen = set()
+        weights = [0.0] * len(self.intents)
+        for _, keyword_id in self.automaton.find(text.lower()):
+            if keyword_id not in seen:
+                seen.add(keyword_id)
+                weights[self._keyword_intents[keyword_id]] += self._keyword_weights[keyword_id]
+
+        matched = [(i, w) for i, w in enumerate(weights) if w > 0]
+        matched.sort(key=lambda pair: (-pair[1], pair[0]))
+        return [(self.intents[i], w) for i, w in matched]
+
+    def matched_intents(self, text: str) -> List[str]:
+        """Matched intents in declaration order"""
+        matched = {intent for intent, _ in self.scores(text)}
+        return [intent for intent in self.intents if intent in matched]
+
+    def classify(self, text: str, default: str = 'general') -> str:
+        """Best matching intent, or ``default`` when no keyword matches"""
+        scores = self.scores(text)
+        return scores[0][0] if scores else default
+
+
+_default_classifier = IntentClassifier()
+
 
 def classify_intent(question):
-    question_lower = question.lower()
-    
-    if any(word in question_lower for word in ['fee', 'cost', 'payment', 'money']):
-        return 'fees'
-    elif any(word in question_lower for word in ['date', 'deadline', 'when', 'time']):
-        return 'dates'
-    elif any(word in question_lower for word in ['eligibility', 'criteria', 'requirement']):
-        return 'eligibility'
-    elif any(word in question_lower for word in ['course', 'program', 'degree']):
-        return 'courses'
-    else:
-        return 'general'
\ No newline at end of file
+    return _default_classifier.classify(question)
+
+
+def intent_scores(question):
+    """Every matched intent with its weight, best first"""
+    return _default_classifier.scores(question)
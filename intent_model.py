@@ -0,0 +1,219 @@
+import re
+import json
+import time
+import zlib
+import argparse
+from collections import Counter
+from functools import lru_cache
+from typing import List, Tuple, Optional
+
+import numpy as np
+
+DEFAULT_MODEL_PATH = 'intent_model.npz'
+# Hashed feature space; weight rows that never saw a feature stay zero and
+# are not written to disk, so the file only grows with the vocabulary
+DEFAULT_N_FEATURES = 2 ** 18
+
+_WORD_RE = re.compile(r'\w+')
+
+
+@lru_cache(maxsize=65536)
+def _hash(feature: str, n_features: int) -> int:
+    # crc32 rather than hash() so feature ids are stable across processes
+    return zlib.crc32(feature.encode('utf-8')) % n_features
+
+
+@lru_cache(maxsize=65536)
+def _word_feature_ids(word: str, n_features: int) -> Tuple[int, ...]:
+    """Hashed ids of a word's unigram and character trigram features"""
+    padded = f'<{word}>'
+    features = ['w:' + word] + ['c:' + padded[i:i + 3] for i in range(len(padded) - 2)]
+    return tuple(_hash(feature, n_features) for feature in features)
+
+
+def hash_features(texts: List[str], n_features: int = DEFAULT_N_FEATURES) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """CSR rows (indptr, indices, values) of hashed, L2-normalized n-gram counts.
+
+    Features are word unigrams, word bigrams and the character trigrams of
+    each word.
+    """
+    indptr = [0]
+    indices = []
+    values = []
+    for text in texts:
+        words = _WORD_RE.findall(text.lower())
+        ids = [_hash('b:' + a + ' ' + b, n_features) for a, b in zip(words, words[1:])]
+        for word in words:
+            ids.extend(_word_feature_ids(word, n_features))
+        counts = Counter(ids)
+        norm = sum(c * c for c in counts.values()) ** 0.5
+        indices.extend(counts)
+        values.extend(c / norm for c in counts.values())
+        indptr.append(len(indices))
+    return (np.array(indptr, dtype=np.int64), np.array(indices, dtype=np.int64),
+            np.array(values, dtype=np.float32))
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    logits = logits - logits.max(axis=1, keepdims=True)
+    np.exp(logits, out=logits)
+    logits /= logits.sum(axis=1, keepdims=True)
+    return logits
+
+
+class IntentModel:
+    """Multinomial logistic regression over hashed word and character n-grams"""
+
+    def __init__(self, classes: List[str], weights: np.ndarray, bias: np.ndarray):
+        self.classes = list(classes)
+        self.weights = weights
+        self.bias = bias
+
+    @property
+    def n_features(self) -> int:
+        return self.weights.shape[0]
+
+    def _logits(self, indptr: np.ndarray, indices: np.ndarray, values: np.ndarray) -> np.ndarray:
+        # Sparse rows times the weight matrix: gather the weight rows of every
+        # feature, then sum each question's block via a cumulative sum
+        contributions = self.weights[indices] * values[:, None]
+        totals = np.zeros((len(indices) + 1, len(self.classes)))
+        np.cumsum(contributions, axis=0, dtype=np.float64, out=totals[1:])
+        return totals[indptr[1:]] - totals[indptr[:-1]] + self.bias
+
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        """Class probabilities, one row per text (columns follow ``classes``)"""
+        return _softmax(self._logits(*hash_features(texts, self.n_features)))
+
+    def predict(self, texts: List[str]) -> List[Tuple[str, float]]:
+        """Most likely intent and its probability for each text"""
+        if not texts:
+            return []
+        logits = self._logits(*hash_features(texts, self.n_features))
+        best = logits.argmax(axis=1)
+        # Softmax probability of the winning class only
+        top = logits[np.arange(len(best)), best]
+        confidence = 1.0 / np.exp(logits - top[:, None]).sum(axis=1)
+        return [(self.classes[i], float(p)) for i, p in zip(best, confidence)]
+
+    def classify(self, text: str) -> Tuple[str, float]:
+        return self.predict([text])[0]
+
+    def save(self, path: str = DEFAULT_MODEL_PATH):
+        rows = np.flatnonzero(np.any(self.weights != 0, axis=1))
+        np.savez_compressed(
+            path,
+            classes=np.array(self.classes),
+            n_features=np.array(self.n_features),
+            rows=rows.astype(np.int32),
+            row_weights=self.weights[rows],
+            bias=self.bias,
+        )
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_MODEL_PATH) -> 'IntentModel':
+        with np.load(path) as data:
+            classes = [str(c) for c in data['classes']]
+            weights = np.zeros((int(data['n_features']), len(classes)), dtype=np.float32)
+            weights[data['rows']] = data['row_weights']
+            return cls(classes, weights, data['bias'].astype(np.float32))
+
+
+def train_intent_model(texts: List[str], labels: List[str], n_features: int = DEFAULT_N_FEATURES,
+                       epochs: int = 20, learning_rate: float = 0.5, l2: float = 1e-5,
+                       batch_size: int = 64, seed: int = 0) -> IntentModel:
+    """Fit the model with mini-batch gradient descent on the cross-entropy loss"""
+    classes = sorted(set(labels))
+    class_ids = {c: i for i, c in enumerate(classes)}
+    targets = np.array([class_ids[label] for label in labels], dtype=np.int64)
+    indptr, indices, values = hash_features(texts, n_features)
+
+    model = IntentModel(classes, np.zeros((n_features, len(classes)), dtype=np.float32),
+                        np.zeros(len(classes), dtype=np.float32))
+    rng = np.random.default_rng(seed)
+    for _ in range(epochs):
+        order = rng.permutation(len(texts))
+        for start in range(0, len(order), batch_size):
+            rows = order[start:start + batch_size]
+            starts, ends = indptr[rows], indptr[rows + 1]
+            counts = ends - starts
+            # Slice the batch's features out of the CSR arrays
+            positions = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+            batch_indptr = np.concatenate(([0], np.cumsum(counts)))
+            batch_indices, batch_values = indices[positions], values[positions]
+
+            probs = _softmax(model._logits(batch_indptr, batch_indices, batch_values))
+            probs[np.arange(len(rows)), targets[rows]] -= 1
+            probs /= len(rows)
+
+            # Only the weight rows of features in this batch get a gradient
+            # (and the L2 penalty), so unseen rows stay exactly zero
+            gradient = probs[np.repeat(np.arange(len(rows)), counts)] * batch_values[:, None]
+            touched, inverse = np.unique(batch_indices, return_inverse=True)
+            row_gradient = np.zeros((len(touched), len(classes)), dtype=np.float32)
+            np.add.at(row_gradient, inverse, gradient)
+            row_gradient += l2 * model.weights[touched]
+            model.weights[touched] -= learning_rate * row_gradient
+            model.bias -= learning_rate * probs.sum(axis=0)
+    return model
+
+
+def load_training_data(db_path: str = 'chatbot.db', faq_path: Optional[str] = 'college_faq.json') -> Tuple[List[str], List[str]]:
+    """Labeled questions from the conversations table, seeded with the FAQ prompts.
+
+    Only conversation labels the model did not predict itself are used (see
+    ``ChatDatabase.get_labeled_conversations``).
+    """
+    from database import ChatDatabase
+    from faq_index import entry_intent
+
+    texts, labels = [], []
+    if faq_path:
+        # FAQ prompts labeled with their entry intents (the labels the app
+        # reports for them) so a fresh install has a model before any traffic
+        with open(faq_path, 'r', encoding='utf-8') as f:
+            for item in json.load(f):
+                texts.append(item['prompt'])
+                labels.append(entry_intent(item))
+    for question, intent in ChatDatabase(db_path).get_labeled_conversations():
+        texts.append(question)
+        labels.append(intent)
+    return texts, labels
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the hashed n-gram intent classifier from logged conversations")
+    parser.add_argument('--db', default='chatbot.db')
+    parser.add_argument('--faq', default='college_faq.json', help="Seed examples; pass '' to train on conversations only")
+    parser.add_argument('--output', default=DEFAULT_MODEL_PATH)
+    parser.add_argument('--n-features', type=int, default=DEFAULT_N_FEATURES)
+    parser.add_argument('--epochs', type=int, default=20)
+    parser.add_argument('--holdout', type=float, default=0.1, help="Fraction of examples kept aside for accuracy")
+    args = parser.parse_args()
+
+    texts, labels = load_training_data(args.db, args.faq or None)
+    if len(set(labels)) < 2:
+        parser.error("need labeled examples of at least two intents")
+
+    order = np.random.default_rng(0).permutation(len(texts))
+    n_holdout = int(len(texts) * args.holdout)
+    train_ids, test_ids = order[n_holdout:], order[:n_holdout]
+    model = train_intent_model([texts[i] for i in train_ids], [labels[i] for i in train_ids],
+                               n_features=args.n_features, epochs=args.epochs)
+    if n_holdout:
+        predictions = model.predict([texts[i] for i in test_ids])
+        accuracy = np.mean([label == labels[i] for (label, _), i in zip(predictions, test_ids)])
+        print(f"Holdout accuracy: {accuracy:.1%} on {n_holdout} examples")
+
+    # Retrain on everything for the saved model
+    model = train_intent_model(texts, labels, n_features=args.n_features, epochs=args.epochs)
+    model.save(args.output)
+
+    start = time.perf_counter()
+    model.predict(texts)
+    per_question_us = (time.perf_counter() - start) / len(texts) * 1e6
+    print(f"Saved {args.output} ({len(model.classes)} intents, {len(texts)} examples, {per_question_us:.0f} µs/question)")
+
+
+if __name__ == '__main__':
+    main()
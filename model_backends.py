@@ -0,0 +1,92 @@
+import os
+import glob
+import shutil
+import hashlib
+import argparse
+from typing import Optional
+
+BACKENDS = ('pytorch', 'onnx')
+DEFAULT_MODEL = "google/flan-t5-small"
+DEFAULT_ONNX_DIR = "onnx-college-chatbot-int8"
+
+# Files that make up a checkpoint: weights, config and tokenizer
+CHECKPOINT_FILES = ('*.json', '*.safetensors', '*.bin', '*.onnx', '*.onnx_data', '*.model', '*.txt')
+
+
+def checkpoint_version(model_dir: str) -> Optional[str]:
+    """Identify a local checkpoint by the names, sizes and mtimes of its files.
+
+    Retraining or re-exporting rewrites the files, so the version changes
+    without hashing the weights. Returns None for hub ids (not a directory).
+    """
+    if not os.path.isdir(model_dir):
+        return None
+    digest = hashlib.sha1()
+    for path in sorted({p for pattern in CHECKPOINT_FILES for p in glob.glob(os.path.join(model_dir, pattern))}):
+        stat = os.stat(path)
+        digest.update(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def load_pipeline(backend: str = 'pytorch', model_path: str = DEFAULT_MODEL, onnx_dir: str = DEFAULT_ONNX_DIR):
+    """Build a text2text-generation pipeline on the chosen CPU backend.
+
+    The pytorch backend loads ``model_path``; the onnx backend loads the
+    int8 export in ``onnx_dir`` and ignores ``model_path`` (export the
+    checkpoint you want with ``python -m model_backends --model``).
+    """
+    from transformers import pipeline
+
+    if backend == 'pytorch':
+        return pipeline("text2text-generation", model=model_path, local_files_only=True)
+    if backend == 'onnx':
+        from transformers import AutoTokenizer
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+        model = ORTModelForSeq2SeqLM.from_pretrained(onnx_dir, provider="CPUExecutionProvider", local_files_only=True)
+        tokenizer = AutoTokenizer.from_pretrained(onnx_dir, local_files_only=True)
+        return pipeline("text2text-generation", model=model, tokenizer=tokenizer)
+    raise ValueError(f"Unknown model backend: {backend}. Choose from {BACKENDS}")
+
+
+def export_onnx_int8(model_path: str = DEFAULT_MODEL, output_dir: str = DEFAULT_ONNX_DIR) -> str:
+    """Export a seq2seq checkpoint to ONNX and apply int8 dynamic quantization.
+
+    ``model_path`` can be the hub id or a local directory such as the
+    ``college-admission-chatbot`` output of train_college_chatbot.py.
+    """
+    from transformers import AutoTokenizer
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    fp32_dir = output_dir + "-fp32"
+    model = ORTModelForSeq2SeqLM.from_pretrained(model_path, export=True, local_files_only=True)
+    model.save_pretrained(fp32_dir)
+    tokenizer = AutoTokenizer.from_pretrained(model_path, local_files_only=True)
+
+    os.makedirs(output_dir, exist_ok=True)
+    # Quantize every exported graph (encoder, decoder, decoder with past)
+    # under the same file names, so the directory loads like the fp32 one
+    for onnx_path in glob.glob(os.path.join(fp32_dir, "*.onnx")):
+        quantize_dynamic(onnx_path, os.path.join(output_dir, os.path.basename(onnx_path)), weight_type=QuantType.QInt8)
+    for name in os.listdir(fp32_dir):
+        if not name.endswith((".onnx", ".onnx_data")):
+            shutil.copy(os.path.join(fp32_dir, name), output_dir)
+    tokenizer.save_pretrained(output_dir)
+
+    shutil.rmtree(fp32_dir)
+    return output_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the answer model to int8 ONNX for ONNX Runtime")
+    parser.add_argument('--model', default=DEFAULT_MODEL,
+                        help="Hub id or local checkpoint (e.g. ./college-admission-chatbot)")
+    parser.add_argument('--output', default=DEFAULT_ONNX_DIR)
+    args = parser.parse_args()
+
+    print(f"Exported int8 ONNX model to {export_onnx_int8(args.model, args.output)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+import threading
+from typing import Any, Callable, Optional
+
+LOADING = 'loading'
+READY = 'ready'
+FAILED = 'failed'
+DISABLED = 'disabled'
+
+
+class BackgroundModelLoader:
+    """Loads a model on a daemon thread so the UI can render immediately.
+
+    ``model`` stays None until loading finishes; callers check ``ready`` and
+    use their fallback path meanwhile.
+    """
+
+    def __init__(self, load_fn: Optional[Callable[[], Any]]):
+        self.model = None
+        self.error = None
+        self._done = threading.Event()
+
+        if load_fn is None:
+            self.status = DISABLED
+            self._done.set()
+            return
+
+        self.status = LOADING
+        self._thread = threading.Thread(target=self._load, args=(load_fn,), name="model-loader", daemon=True)
+        self._thread.start()
+
+    @property
+    def ready(self) -> bool:
+        return self.status == READY
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until loading finished (either way); returns whether it is ready"""
+        self._done.wait(timeout)
+        return self.ready
+
+    def _load(self, load_fn):
+        try:
+            model = load_fn()
+            if model is None:
+                raise RuntimeError("model loader returned None")
+            self.model = model
+            self.status = READY
+        except Exception as e:
+            self.error = str(e)
+            self.status = FAILED
+        finally:
+            self._done.set()
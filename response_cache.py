@@ -0,0 +1,161 @@
+import os
+import sys
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from faq_index import normalize_prompt
+
+
+def make_cache_key(question: str, context: Dict) -> Tuple:
+    """Cache key from the normalized question and a compact context signature.
+
+    Only the parts of the context that change scoring or personalization are
+    kept: conversation stage, mentioned topics in order (each one adds a
+    boost, and the last one is the intent of a 'general' question) and
+    mentioned courses in order (the last one is quoted).
+    """
+    return (
+        normalize_prompt(question),
+        context.get('conversation_stage', 'initial'),
+        tuple(context.get('mentioned_topics', ())),
+        tuple(context.get('mentioned_courses', ())),
+    )
+
+
+def _estimate_size(key: Hashable, value: Any) -> int:
+    """Rough memory footprint of a cache entry in bytes"""
+    size = sys.getsizeof(key)
+    if isinstance(key, tuple):
+        size += sum(sys.getsizeof(part) for part in key)
+    if isinstance(value, dict):
+        size += sys.getsizeof(value) + sum(sys.getsizeof(v) for v in value.values())
+    else:
+        size += sys.getsizeof(value)
+    return size
+
+
+class ResponseCache:
+    """Thread-safe LRU + TTL cache with a memory cap and hit/miss counters.
+
+    When ``watch_path`` is set, the cache is cleared as soon as that file's
+    modification time changes (checked at most every ``check_interval`` s).
+    """
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: float = 3600,
+                 max_bytes: int = 16 * 1024 * 1024, watch_path: Optional[str] = None,
+                 check_interval: float = 2.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.watch_path = watch_path
+        self.check_interval = check_interval
+
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._watched_mtime = self._current_mtime()
+        self._last_check = time.monotonic()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return a cached value, or None on miss/expiry"""
+        self._check_source()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, size, value = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        """Store a value, evicting least recently used entries over the caps"""
+        size = _estimate_size(key, value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, size, value)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def invalidate_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """Drop entries for which ``predicate(key, value)`` is true; returns how many"""
+        with self._lock:
+            stale = [key for key, (_, _, value) in self._entries.items() if predicate(key, value)]
+            for key in stale:
+                self._remove(key)
+            self.invalidations += len(stale)
+        return len(stale)
+
+    def stats(self) -> Dict:
+        """Counters plus current size and hit rate"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _current_mtime(self):
+        if not self.watch_path:
+            return None
+        try:
+            return os.stat(self.watch_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _check_source(self):
+        """Clear the cache if the watched FAQ file changed"""
+        if not self.watch_path:
+            return
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+
+        mtime = self._current_mtime()
+        if mtime != self._watched_mtime:
+            self._watched_mtime = mtime
+            self.clear()
+            self.invalidations += 1
@@ -1,26 +1,75 @@
 import re
+import heapq
 from typing import List, Dict, Tuple
 import json
 from datetime import datetime
+from bm25_index import BM25Index
+from intent_classifier import IntentClassifier, TOPIC_KEYWORDS, classify_intent
+from response_cache import ResponseCache, make_cache_key
+from faq_index import normalize_prompt
+
+RANKING_MODES = ('jaccard', 'bm25')
+
+_topic_classifier = IntentClassifier(TOPIC_KEYWORDS)
 
 class SmartResponseSystem:
-    def __init__(self, faq_data):
-        self.faq_data = faq_data
+    def __init__(self, faq_data, ranking: str = 'jaccard', response_cache: ResponseCache = None,
+                 faq_path: str = 'college_faq.json'):
+        if ranking not in RANKING_MODES:
+            raise ValueError(f"Unknown ranking mode: {ranking}. Choose from {RANKING_MODES}")
+        
+        self.ranking = ranking
         self.context_memory = {}
-        self.response_cache = {}
+        # Bounded LRU/TTL cache, cleared automatically when the FAQ file changes.
+        # Pass faq_path=None when a FAQStore drives apply_faq_update instead.
+        self.response_cache = response_cache if response_cache is not None else ResponseCache(watch_path=faq_path)
+        
+        # FAQ entries and the BM25 matrix built from them are swapped together
+        # as one tuple, so a hot reload never pairs new entries with old scores
+        self._ranking_state = (faq_data, self._build_bm25(faq_data))
+    
+    @property
+    def faq_data(self) -> List[Dict]:
+        return self._ranking_state[0]
+    
+    @property
+    def bm25_index(self):
+        return self._ranking_state[1]
+    
+    def _build_bm25(self, faq_data):
+        """Precompute the BM25 term-weight matrix once for all prompts"""
+        if self.ranking != 'bm25':
+            return None
+        return BM25Index([item['prompt'] for item in faq_data])
+    
+    def apply_faq_update(self, faq_data: List[Dict], changes=None):
+        """Swap in a new FAQ version and drop only the cached answers it affects.
+        
+        ``changes`` is the FAQChanges from FAQIndex.updated; without it the
+        whole response cache is cleared. BM25 weights depend on corpus-wide
+        statistics, so that matrix is rebuilt rather than patched.
+        """
+        self._ranking_state = (faq_data, self._build_bm25(faq_data))
+        
+        if changes is None or changes.prompts_changed:
+            # New or edited prompts can change which entry wins for any question
+            self.response_cache.clear()
+        elif changes:
+            affected = changes.affected_prompts
+            self.response_cache.invalidate_where(lambda key, value: value.get('source_prompt') in affected)
         
     def get_smart_answer(self, question: str, user_id: str, conversation_history: List[Dict]) -> Tuple[str, str, float]:
         """Get answer with context awareness and confidence scoring"""
         
-        # Check cache first
-        cache_key = self._generate_cache_key(question)
-        if cache_key in self.response_cache:
-            cached = self.response_cache[cache_key]
-            return cached['answer'], cached['intent'], cached['confidence']
-        
         # Analyze context from conversation history
         context = self._analyze_context(conversation_history)
         
+        # Check cache first (the answer depends on the context too)
+        cache_key = self._generate_cache_key(question, context)
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            return cached['answer'], cached['intent'], cached['confidence']
+        
         # Find best match with context
         best_match, confidence = self._find_best_match_with_context(question, context)
         
@@ -32,18 +81,38 @@ class SmartResponseSystem:
             answer = self._personalize_response(answer, context, conversation_history)
             
             # Cache the response
-            self.response_cache[cache_key] = {
+            self.response_cache.put(cache_key, {
                 'answer': answer,
                 'intent': intent,
                 'confidence': confidence,
+                'source_prompt': normalize_prompt(best_match['prompt']),
                 'timestamp': datetime.now().isoformat()
-            }
+            })
             
             return answer, intent, confidence
         
         # Fallback to contextual help
         return self._generate_contextual_fallback(question, context), 'general', 0.3
     
+    def _generate_cache_key(self, question: str, context: Dict) -> Tuple:
+        """Cache key from the normalized question and context signature"""
+        return make_cache_key(question, context)
+    
+    def _classify_intent_advanced(self, question: str, context: Dict) -> str:
+        """Classify intent, falling back to the latest topic in the conversation"""
+        intent = classify_intent(question)
+        if intent == 'general' and context['mentioned_topics']:
+            return context['mentioned_topics'][-1]
+        return intent
+    
+    def _generate_contextual_fallback(self, question: str, context: Dict) -> str:
+        """Fallback answer pointing at topics the student already asked about"""
+        fallback = "I'm sorry, I don't have specific information about that. Please contact our admissions office at admissions@college.edu or call +91-1234567890 for detailed assistance."
+        if context['mentioned_topics']:
+            topics = ", ".join(sorted(set(context['mentioned_topics'])))
+            fallback += f"\n\n💡 You can also ask me more about {topics}."
+        return fallback
+    
     def _analyze_context(self, conversation_history: List[Dict]) -> Dict:
         """Analyze conversation context"""
         context = {
@@ -67,13 +136,8 @@ class SmartResponseSystem:
             courses = re.findall(r'\b(b\.?tech|mba|bca|mca|b\.?com|m\.?com)\b', question)
             context['mentioned_courses'].extend(courses)
             
-            # Extract topics
-            if 'fee' in question or 'cost' in question:
-                context['mentioned_topics'].append('fees')
-            if 'eligibility' in question or 'criteria' in question:
-                context['mentioned_topics'].append('eligibility')
-            if 'date' in question or 'deadline' in question:
-                context['mentioned_topics'].append('dates')
+            # Extract topics (single pass over the question for all keywords)
+            context['mentioned_topics'].extend(_topic_classifier.matched_intents(question))
         
         # Determine conversation stage
         if len(conversation_history) > 5:
@@ -85,6 +149,9 @@ class SmartResponseSystem:
     
     def _find_best_match_with_context(self, question: str, context: Dict) -> Tuple[Dict, float]:
         """Find best match considering context"""
+        if self.bm25_index is not None:
+            return self._find_best_match_bm25(question, context)
+        
         question_lower = question.lower()
         best_match = None
         max_score = 0
@@ -98,8 +165,35 @@ class SmartResponseSystem:
         
         return best_match, max_score
     
+    def _find_best_match_bm25(self, question: str, context: Dict) -> Tuple[Dict, float]:
+        """Score all items at once with BM25 plus vectorized context boosts"""
+        faq_data, bm25_index = self._ranking_state
+        if not faq_data:
+            return None, 0
+        
+        base_scores = bm25_index.score(question)
+        if not base_scores.any():
+            return None, 0
+        
+        boost = bm25_index.context_boost(
+            context['mentioned_topics'], context['mentioned_courses'], context['conversation_stage']
+        )
+        scores = (base_scores + boost).clip(max=1.0)
+        scores[base_scores == 0] = 0
+        
+        best_idx = int(scores.argmax())
+        return faq_data[best_idx], float(scores[best_idx])
+    
     def _calculate_relevance_score(self, question: str, faq_item: Dict, context: Dict) -> float:
         """Calculate relevance score with context"""
+        base_score, context_boost = self._score_components(question, faq_item, context)
+        # Context alone never makes an item relevant (same rule as BM25 mode)
+        if not base_score:
+            return 0
+        return min(base_score + context_boost, 1.0)
+    
+    def _score_components(self, question: str, faq_item: Dict, context: Dict) -> Tuple[float, float]:
+        """Return (base similarity, context boost); base is None when either side has no words"""
         prompt_lower = faq_item['prompt'].lower()
         
         # Base similarity score
@@ -107,7 +201,7 @@ class SmartResponseSystem:
         prompt_words = set(prompt_lower.split())
         
         if not question_words or not prompt_words:
-            return 0
+            return None, 0
         
         base_score = len(question_words.intersection(prompt_words)) / len(question_words.union(prompt_words))
         
@@ -128,7 +222,61 @@ class SmartResponseSystem:
         if context['conversation_stage'] == 'detailed' and len(prompt_lower) > 50:
             context_boost += 0.1
         
-        return min(base_score + context_boost, 1.0)
+        return base_score, context_boost
+    
+    def get_top_candidates(self, question: str, conversation_history: List[Dict] = None, k: int = 3) -> List[Dict]:
+        """Return the k best FAQ items with base, context and keyword score components.
+        
+        Selection is partial (heap / argpartition), so the FAQ is scored once
+        and never fully sorted.
+        """
+        context = self._analyze_context(conversation_history or [])
+        
+        if self.bm25_index is not None:
+            return self._top_candidates_bm25(question, context, k)
+        
+        question_lower = question.lower()
+        faq_data = self.faq_data
+        scored = []
+        for idx, item in enumerate(faq_data):
+            base_score, context_boost = self._score_components(question_lower, item, context)
+            if not base_score:
+                continue
+            score = min(base_score + context_boost, 1.0)
+            if score > 0:
+                scored.append((score, -idx, base_score, context_boost))
+        
+        return [
+            self._candidate(faq_data[-neg_idx], score, base_score, context_boost)
+            for score, neg_idx, base_score, context_boost in heapq.nlargest(k, scored)
+        ]
+    
+    def _top_candidates_bm25(self, question: str, context: Dict, k: int) -> List[Dict]:
+        """Top-k selection over the vectorized BM25 scores"""
+        faq_data, bm25_index = self._ranking_state
+        if not faq_data or k <= 0:
+            return []
+        
+        base_scores = bm25_index.score(question)
+        boost = bm25_index.context_boost(
+            context['mentioned_topics'], context['mentioned_courses'], context['conversation_stage']
+        )
+        scores = (base_scores + boost).clip(max=1.0)
+        scores[base_scores == 0] = 0
+        
+        return [
+            self._candidate(faq_data[i], float(scores[i]), float(base_scores[i]), float(boost[i]))
+            for i in bm25_index.top_k(scores, k) if scores[i] > 0
+        ]
+    
+    def _candidate(self, item: Dict, score: float, base_score: float, context_boost: float) -> Dict:
+        return {
+            'item': item,
+            'score': score,
+            'base_score': base_score,
+            'context_boost': context_boost,
+            'keyword_boost': 0.0,
+        }
     
     def _personalize_response(self, answer: str, context: Dict, history: List[Dict]) -> str:
         """Personalize response based on context"""
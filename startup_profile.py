@@ -0,0 +1,118 @@
+import os
+import ast
+import sys
+import argparse
+import subprocess
+from typing import List, Dict, Tuple
+
+# Modules the app imports at startup (app.py itself runs the UI on import,
+# so its top-level imports are checked statically instead)
+STARTUP_MODULES = [
+    'faq_store', 'faq_index', 'intent_classifier', 'inference_service',
+    'database', 'model_backends', 'model_loader', 'embedding_index', 'answer_cascade',
+]
+UI_SCRIPTS = ['app.py', 'analytics_dashboard.py']
+
+# Must only be imported when their feature is first used
+HEAVY_MODULES = ['transformers', 'torch', 'pandas', 'plotly', 'pdfplumber', 'onnxruntime', 'optimum']
+
+DEFAULT_BUDGET_MS = 300
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def measure_imports(modules: List[str]) -> Tuple[List[Dict], float]:
+    """Run ``python -X importtime`` in a fresh interpreter and parse its report"""
+    code = "; ".join(f"import {m}" for m in modules)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, cwd=PROJECT_DIR
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        entries.append({
+            'module': name.strip(),
+            'depth': (len(name) - len(name.lstrip())) // 2,
+            'self_ms': int(self_us) / 1000,
+            'cumulative_ms': int(cumulative_us) / 1000,
+        })
+
+    # Top-level entries (smallest indent) add up to the whole import
+    top_depth = min((e['depth'] for e in entries), default=0)
+    total_ms = sum(e['cumulative_ms'] for e in entries if e['depth'] == top_depth)
+    return entries, total_ms
+
+
+def eager_heavy_imports(script: str) -> List[str]:
+    """Heavy modules imported unconditionally at module level in a script"""
+    with open(os.path.join(PROJECT_DIR, script), 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=script)
+
+    found = []
+    nodes = list(tree.body)
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            # Class bodies run at import time, methods do not
+            if isinstance(node, ast.ClassDef):
+                nodes.extend(n for n in node.body if not isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef)))
+            continue
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            names = [node.module or '']
+        elif isinstance(node, (ast.Try, ast.ExceptHandler)):
+            # try/except at module level still runs on import; imports under
+            # an `if` only run when that feature is used, so they are allowed
+            names = []
+            for field in ('body', 'orelse', 'finalbody', 'handlers'):
+                nodes.extend(getattr(node, field, []) or [])
+        else:
+            names = []
+        found.extend(n for n in names if n.split('.')[0] in HEAVY_MODULES)
+    return sorted(set(found))
+
+
+def heavy_import_failures(entries: List[Dict]) -> List[str]:
+    """Heavy libraries loaded by the startup modules or imported eagerly by the UI scripts"""
+    failures = []
+    loaded_heavy = sorted({e['module'].split('.')[0] for e in entries} & set(HEAVY_MODULES))
+    if loaded_heavy:
+        failures.append(f"heavy modules imported at startup: {', '.join(loaded_heavy)}")
+    for script in UI_SCRIPTS:
+        eager = eager_heavy_imports(script)
+        if eager:
+            failures.append(f"{script} imports {', '.join(eager)} at module level")
+    return failures
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Report startup import time and enforce the budget")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help="Fail if importing the startup modules takes longer")
+    parser.add_argument('--top', type=int, default=15, help="Slowest modules to list")
+    args = parser.parse_args(argv)
+
+    entries, total_ms = measure_imports(STARTUP_MODULES)
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for entry in sorted(entries, key=lambda e: e['cumulative_ms'], reverse=True)[:args.top]:
+        print(f"{entry['cumulative_ms']:>14.1f} {entry['self_ms']:>9.1f}  {entry['module']}")
+    print(f"\nTotal startup import time: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    failures = heavy_import_failures(entries)
+    if total_ms > args.budget_ms:
+        failures.append(f"import time {total_ms:.1f} ms exceeds budget of {args.budget_ms:.0f} ms")
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
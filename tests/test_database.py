@@ -0,0 +1,127 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import ChatDatabase, _INSERT_CONVERSATION
+
+DAYS = ['2025-06-01', '2025-06-02', '2025-06-03']
+SESSIONS = ['s1', 's2', 's3', None]
+INTENTS = ['fees', 'admission', 'hostel', None]
+LANGUAGES = ['en', 'hi', None]
+
+# What each rollup should hold, recomputed from conversations
+RAW_ROLLUPS = {
+    'daily_intent_counts': '''
+        SELECT day, COALESCE(intent, ''), COUNT(*) FROM conversations GROUP BY 1, 2
+    ''',
+    'daily_language_counts': '''
+        SELECT day, COALESCE(language, ''), COUNT(*) FROM conversations GROUP BY 1, 2
+    ''',
+    'daily_sessions': '''
+        SELECT day, COALESCE(session_id, ''), COUNT(*) FROM conversations GROUP BY 1, 2
+    ''',
+    'analytics': '''
+        SELECT day, COUNT(*), COUNT(DISTINCT COALESCE(session_id, '')),
+               (SELECT COALESCE(intent, '') FROM conversations i WHERE i.day = c.day
+                GROUP BY 1 ORDER BY COUNT(*) DESC, 1 LIMIT 1),
+               COALESCE(SUM(rating), 0), COUNT(rating)
+        FROM conversations c GROUP BY day
+    ''',
+    'intent_totals': "SELECT COALESCE(intent, ''), COUNT(*) FROM conversations GROUP BY 1",
+    'language_totals': "SELECT COALESCE(language, ''), COUNT(*) FROM conversations GROUP BY 1",
+    'session_totals': "SELECT COALESCE(session_id, ''), COUNT(*) FROM conversations GROUP BY 1",
+    'conversation_totals': '''
+        SELECT COUNT(*), COUNT(DISTINCT COALESCE(session_id, '')), COALESCE(SUM(rating), 0), COUNT(rating)
+        FROM conversations
+    ''',
+}
+
+ROLLUPS = {
+    'daily_intent_counts': "SELECT day, intent, count FROM daily_intent_counts",
+    'daily_language_counts': "SELECT day, language, count FROM daily_language_counts",
+    'daily_sessions': "SELECT day, session_id, questions FROM daily_sessions",
+    'analytics': '''
+        SELECT date, total_questions, unique_users, top_intent, rating_sum, rating_count FROM analytics
+    ''',
+    'intent_totals': "SELECT intent, count FROM intent_totals",
+    'language_totals': "SELECT language, count FROM language_totals",
+    'session_totals': "SELECT session_id, questions FROM session_totals",
+    'conversation_totals': "SELECT questions, sessions, rating_sum, rating_count FROM conversation_totals",
+}
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = ChatDatabase(str(tmp_path / "chatbot.db"), write_behind=True, flush_interval_ms=10)
+    yield db
+    db.close()
+
+
+def assert_rollups_match(db):
+    with db._connection() as conn:
+        for table, query in ROLLUPS.items():
+            assert sorted(conn.execute(query)) == sorted(conn.execute(RAW_ROLLUPS[table])), table
+        for date, total, users, length in conn.execute(
+                "SELECT date, total_questions, unique_users, avg_session_length FROM analytics"):
+            assert length == pytest.approx(total / users), date
+
+
+def random_row(rng, day):
+    return (rng.choice(SESSIONS), 'q%d' % rng.randint(0, 5), 'answer', rng.choice(INTENTS),
+            rng.choice(LANGUAGES), None, day + ' 12:00:00', rng.choice([None, None, 1, 3, 5]), None)
+
+
+def test_rollups_match_group_by(db):
+    rng = random.Random(42)
+    for _ in range(200):
+        op = rng.random()
+        if op < 0.2:
+            # Today's rows go through the write-behind queue
+            db.save_conversation(rng.choice(SESSIONS), 'q%d' % rng.randint(0, 5), 'answer',
+                                 rng.choice(INTENTS), rng.choice(LANGUAGES), rating=rng.choice([None, 4]))
+        elif op < 0.3:
+            db.rate_conversation(rng.choice(SESSIONS), 'q%d' % rng.randint(0, 5), rng.randint(1, 5))
+        else:
+            db.flush()
+            with db._connection() as conn, conn:
+                if op < 0.7:
+                    conn.execute(_INSERT_CONVERSATION, random_row(rng, rng.choice(DAYS)))
+                elif op < 0.85:
+                    conn.execute("UPDATE conversations SET rating = ? WHERE id = (SELECT id FROM conversations "
+                                 "ORDER BY RANDOM() LIMIT 1)", (rng.choice([None, 2, 5]),))
+                else:
+                    conn.execute("DELETE FROM conversations WHERE id = (SELECT id FROM conversations "
+                                 "ORDER BY RANDOM() LIMIT 1)")
+        if rng.random() < 0.1:
+            db.flush()
+            assert_rollups_match(db)
+
+    db.flush()
+    assert_rollups_match(db)
+
+
+def test_analytics_summary_matches_group_by(db):
+    rng = random.Random(7)
+    with db._connection() as conn, conn:
+        conn.executemany(_INSERT_CONVERSATION, [random_row(rng, rng.choice(DAYS)) for _ in range(100)])
+        conn.execute("DELETE FROM conversations WHERE id % 7 = 0")
+    db.save_conversation('s1', 'q1', 'answer', 'fees', 'en')
+    db.rate_conversation('s1', 'q1', 5)
+    db.flush()
+
+    summary = db._query_analytics_summary(days=2)
+    with db._connection() as conn:
+        questions, sessions, rating_sum, rating_count = conn.execute(RAW_ROLLUPS['conversation_totals']).fetchone()
+        intents = dict(conn.execute(RAW_ROLLUPS['intent_totals']))
+        languages = dict(conn.execute(RAW_ROLLUPS['language_totals']))
+        days = conn.execute("SELECT day, COUNT(*) FROM conversations GROUP BY day ORDER BY day DESC LIMIT 2").fetchall()
+
+    assert (summary['total_conversations'], summary['unique_users']) == (questions, sessions)
+    assert (summary['rating_sum'], summary['rating_count']) == (rating_sum, rating_count)
+    assert dict(zip(summary['intent_data']['intent'], summary['intent_data']['count'])) == intents
+    assert dict(zip(summary['language_data']['language'], summary['language_data']['count'])) == languages
+    assert list(zip(summary['daily_data']['date'], summary['daily_data']['count'])) == days
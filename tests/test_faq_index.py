@@ -0,0 +1,74 @@
+import copy
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from faq_index import FAQIndex
+
+WORDS = ['what', 'is', 'the', 'fee', 'fees', 'for', 'mba', 'b.tech', 'hostel', 'scholarship',
+         'scholarships', 'last', 'date', 'to', 'apply', 'How', 'much', 'Library', 'timings?']
+INTENTS = [None, 'fees', 'admission', 'hostel']
+
+
+def random_entry(rng):
+    prompt = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 6)))
+    if rng.random() < 0.3:
+        prompt += rng.choice(['?', ' ?', '.', '  '])
+    entry = {'prompt': prompt, 'response': 'answer %d' % rng.randint(0, 3)}
+    intent = rng.choice(INTENTS)
+    if intent:
+        entry['intent'] = intent
+    return entry
+
+
+def random_edit(rng, faq_data):
+    faq_data = list(faq_data)
+    op = rng.choice(['append', 'pop', 'prompt', 'response', 'intent', 'duplicate'])
+    if op == 'append' or not faq_data:
+        faq_data.extend(random_entry(rng) for _ in range(rng.randint(1, 3)))
+    elif op == 'pop':
+        del faq_data[len(faq_data) - rng.randint(1, min(3, len(faq_data))):]
+    elif op == 'duplicate':
+        faq_data.append(dict(rng.choice(faq_data)))
+    else:
+        i = rng.randrange(len(faq_data))
+        entry = dict(faq_data[i])
+        if op == 'prompt':
+            entry['prompt'] = random_entry(rng)['prompt']
+        elif op == 'response':
+            entry['response'] += '!'
+        else:
+            entry['intent'] = rng.choice(INTENTS[1:])
+        faq_data[i] = entry
+    return faq_data
+
+
+def index_tables(index):
+    """Every lookup table of ``index``, with posting lists in a canonical order"""
+    return {
+        'prompts_lower': index.prompts_lower,
+        'prompt_tokens': index.prompt_tokens,
+        'normalized_prompts': index.normalized_prompts,
+        'postings': {token: sorted(ids) for token, ids in index.postings.items() if ids},
+        'boost_postings': {term: sorted(ids) for term, ids in index.boost_postings.items()},
+        'exact': index.exact,
+        'intents': index.intents,
+    }
+
+
+def test_updated_matches_fresh_index():
+    rng = random.Random(1234)
+    faq_data = [random_entry(rng) for _ in range(8)]
+    index = FAQIndex(faq_data)
+
+    for _ in range(300):
+        new_faq_data = random_edit(rng, faq_data)
+        before = copy.deepcopy(index_tables(index))
+        updated, _ = index.updated(new_faq_data)
+
+        assert index_tables(updated) == index_tables(FAQIndex(new_faq_data))
+        # The previous index stays consistent for readers still holding it
+        assert index_tables(index) == before
+        faq_data, index = new_faq_data, updated
@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import startup_profile
+
+
+def test_no_heavy_imports_at_startup():
+    """Startup modules and UI scripts must leave heavy libraries to first use"""
+    entries, _ = startup_profile.measure_imports(startup_profile.STARTUP_MODULES)
+    assert startup_profile.heavy_import_failures(entries) == []
+
+
+@pytest.mark.skipif(not os.environ.get('STARTUP_BUDGET_MS'),
+                    reason="wall-clock budget is opt-in (set STARTUP_BUDGET_MS)")
+def test_startup_import_budget():
+    budget_ms = float(os.environ['STARTUP_BUDGET_MS'])
+    _, total_ms = startup_profile.measure_imports(startup_profile.STARTUP_MODULES)
+    assert total_ms <= budget_ms, f"import time {total_ms:.1f} ms exceeds budget of {budget_ms:.0f} ms"
@@ -1,30 +1,44 @@
+import os
+import hashlib
 from datasets import load_dataset
 from transformers import AutoTokenizer, AutoModelForSeq2SeqLM, Trainer, TrainingArguments, DataCollatorForSeq2Seq
 
-# Load your custom dataset
-dataset = load_dataset("json", data_files="college_faq.json")["train"]
+FAQ_PATH = "college_faq.json"
+MAX_LENGTH = 128
+# Tokenized datasets are cached here and reused until the FAQ or model changes
+CACHE_DIR = os.environ.get("TRAIN_CACHE_DIR", ".tokenized_cache")
+NUM_PROC = int(os.environ.get("TRAIN_NUM_PROC", os.cpu_count() or 1))
 
-# Format data
-def format_data(example):
-    example["input"] = f"### Question: {example['prompt']}"
-    example["output"] = example["response"]
-    return example
+# Load your custom dataset
+dataset = load_dataset("json", data_files=FAQ_PATH)["train"]
 
-dataset = dataset.map(format_data)
+with open(FAQ_PATH, "rb") as f:
+    faq_hash = hashlib.sha1(f.read()).hexdigest()
 
 # Use FLAN-T5 or switch to a different model
 model_name = "google/flan-t5-small"  # This might work better
 tokenizer = AutoTokenizer.from_pretrained(model_name)
 model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
 
-# Tokenize
-def tokenize(example):
-    inputs = tokenizer(example["input"], padding="max_length", truncation=True, max_length=128)
-    targets = tokenizer(example["output"], padding="max_length", truncation=True, max_length=128)
+# Format and tokenize without padding; the collator pads each batch only to
+# its longest example (labels are padded with -100 so padding is not learned)
+def tokenize(batch):
+    inputs = tokenizer([f"### Question: {prompt}" for prompt in batch["prompt"]], truncation=True, max_length=MAX_LENGTH)
+    targets = tokenizer(text_target=batch["response"], truncation=True, max_length=MAX_LENGTH)
     inputs["labels"] = targets["input_ids"]
+    inputs["length"] = [len(ids) for ids in inputs["input_ids"]]
     return inputs
 
-tokenized = dataset.map(tokenize)
+os.makedirs(CACHE_DIR, exist_ok=True)
+cache_name = f"{faq_hash[:16]}-{model_name.replace('/', '_')}-{MAX_LENGTH}.arrow"
+tokenized = dataset.map(
+    tokenize,
+    batched=True,
+    num_proc=max(1, min(NUM_PROC, len(dataset))),
+    remove_columns=dataset.column_names,
+    cache_file_name=os.path.join(CACHE_DIR, cache_name),
+    load_from_cache_file=True,
+)
 
 # Set up training
 training_args = TrainingArguments(
@@ -34,18 +48,25 @@ training_args = TrainingArguments(
     logging_steps=10,
     save_steps=500,
     save_total_limit=2,
-    evaluation_strategy="no"
+    evaluation_strategy="no",
+    # Batch examples of similar length together so padding stays small
+    group_by_length=True,
+    length_column_name="length",
 )
 
 trainer = Trainer(
     model=model,
     args=training_args,
     train_dataset=tokenized,
-    data_collator=DataCollatorForSeq2Seq(tokenizer, model)
+    data_collator=DataCollatorForSeq2Seq(tokenizer, model, label_pad_token_id=-100)
 )
 
 # Train the model
-trainer.train()
+train_result = trainer.train()
+
+metrics = train_result.metrics
+print(f"Trained {len(tokenized)} examples x {training_args.num_train_epochs} epochs "
+      f"in {metrics['train_runtime']:.1f}s ({metrics['train_samples_per_second']:.1f} samples/sec)")
 
 # Save the model
 trainer.save_model("college-admission-chatbot")